@@ -0,0 +1 @@
+"""⏱️ 推荐引擎基准测试 - 合成数据生成与耗时 / 峰值内存测量"""
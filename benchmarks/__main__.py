@@ -0,0 +1,104 @@
+"""⏱️ 基准测试命令行工具
+
+    python -m benchmarks generate --scale 1m
+    python -m benchmarks run --scale 100k --repeat 5 --output benchmarks/results/before.json
+    python -m benchmarks run --scale 10m --skip 'build.neighbors' 'build.als' 'user.als'
+    python -m benchmarks compare benchmarks/results/before.json benchmarks/results/after.json
+    python -m benchmarks load-test --sessions 8 --rounds 3
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from benchmarks.generate import SCALES, generate, scale_dir
+from benchmarks.loadtest import APP_PATH, TIMEOUT, run_load_test
+from benchmarks.suite import BENCHMARKS, THRESHOLD, compare, load, run, save
+
+
+def generate_data(args):
+    """🧪 生成合成数据"""
+    for scale in args.scale:
+        generate(scale, args.output if len(args.scale) == 1 else None, seed=args.seed)
+
+
+def run_suite(args):
+    """⏱️ 运行基准并保存结果"""
+    data_dir = args.data_dir or generate(args.scale, seed=args.seed)
+    scale = None if args.data_dir else args.scale
+    results = run(data_dir, scale=scale, repeat=args.repeat, only=args.only, skip=args.skip)
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"{scale or 'custom'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save(results, output)
+    print(f"💾 已写入 {output}")
+
+
+def load_test(args):
+    """🧑‍🤝‍🧑 并发模拟多个界面会话并保存结果"""
+    results = run_load_test(args.app, sessions=args.sessions, rounds=args.rounds, seed=args.seed,
+                            timeout=args.timeout)
+    output = args.output or os.path.join('benchmarks', 'results', f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    save(results, output)
+    print(f"💾 已写入 {output}")
+    if results['errors'] and args.fail:
+        sys.exit(1)
+
+
+def compare_results(args):
+    """📐 对比两份结果"""
+    base, new = load(args.base), load(args.new)
+    for key in ('scale', 'ratings', 'fingerprint', 'cpus'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"⚠️ 两次运行的 {key} 不同: {base['meta'].get(key)} → {new['meta'].get(key)}")
+    table, slower = compare(base, new, args.threshold)
+    print(table.round(2).to_string())
+    if slower:
+        print(f"🐢 {len(slower)} 项变慢超过 {args.threshold:.0%}: {', '.join(slower)}")
+        if args.fail:
+            sys.exit(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='⏱️ 推荐引擎基准测试')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generator = commands.add_parser('generate', help='生成 MovieLens 格式的合成数据')
+    generator.add_argument('--scale', choices=SCALES, nargs='+', default=['100k'])
+    generator.add_argument('--output', default=None, help=f"输出目录，默认 {scale_dir('<scale>')}")
+    generator.add_argument('--seed', type=int, default=42)
+    generator.set_defaults(handler=generate_data)
+
+    runner = commands.add_parser('run', help='运行基准并保存 JSON 结果')
+    runner.add_argument('--scale', choices=SCALES, default='100k', help='使用（必要时先生成）该规模的合成数据')
+    runner.add_argument('--data-dir', default=None, help='改用已有的数据目录（例如 data）')
+    runner.add_argument('--seed', type=int, default=42)
+    runner.add_argument('--repeat', type=int, default=5, help='每项基准的计时次数（加载与构建最多 3 次）')
+    runner.add_argument('--only', nargs='+', default=None, metavar='PATTERN',
+                        help=f"只运行匹配的基准（通配符），可选: {', '.join(BENCHMARKS)}")
+    runner.add_argument('--skip', nargs='+', default=None, metavar='PATTERN', help='跳过匹配的基准（通配符）')
+    runner.add_argument('--output', default=None, help='结果文件，默认 benchmarks/results/<规模>-<时间>.json')
+    runner.set_defaults(handler=run_suite)
+
+    loader = commands.add_parser('load-test', help='用 AppTest 并发模拟界面会话，测量每页重新运行的耗时')
+    loader.add_argument('--app', default=APP_PATH)
+    loader.add_argument('--sessions', type=int, default=4, help='并发会话数')
+    loader.add_argument('--rounds', type=int, default=2, help='每个会话把全部页面操作几轮')
+    loader.add_argument('--seed', type=int, default=42)
+    loader.add_argument('--timeout', type=float, default=TIMEOUT, help='单次重新运行的超时秒数')
+    loader.add_argument('--output', default=None, help='结果文件，默认 benchmarks/results/load-<时间>.json')
+    loader.add_argument('--fail', action='store_true', help='有重新运行出错时以状态码 1 退出')
+    loader.set_defaults(handler=load_test)
+
+    diff = commands.add_parser('compare', help='对比两份基准结果')
+    diff.add_argument('base')
+    diff.add_argument('new')
+    diff.add_argument('--threshold', type=float, default=THRESHOLD, help='中位耗时变化超过该比例才标记')
+    diff.add_argument('--fail', action='store_true', help='有基准变慢时以状态码 1 退出')
+    diff.set_defaults(handler=compare_results)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
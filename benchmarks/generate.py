@@ -0,0 +1,180 @@
+"""🧪 合成 MovieLens 格式的评分数据
+
+按 MovieLens 各版本的规模生成 ``ratings.csv`` / ``movies.csv``（列与格式同原始数据），同一种子
+总是生成完全相同的文件：
+
+- 电影热度服从 Zipf 长尾分布，少数电影占据大部分评分，很多电影只有几条或没有评分
+- 每位用户至少 20 条评分，评分数服从对数正态分布（少数重度用户）
+- 评分 = 全局均值 + 用户偏置 + 电影偏置 + 噪声，约一半用户只打整星
+- 标题由词表组合而成（含 "Xxx, The" 后置冠词与同名不同年份的电影），类型按 MovieLens 的频率抽取
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# 规模 → (评分数, 用户数, 电影数)，用户与电影数取自对应的 MovieLens 版本
+SCALES = {
+    '100k': (100_000, 610, 9_742),
+    '1m': (1_000_000, 6_040, 3_883),
+    '10m': (10_000_000, 69_878, 10_681),
+    '25m': (25_000_000, 162_541, 62_423),
+}
+MIN_USER_RATINGS = 20
+GENERATOR_VERSION = 1
+MANIFEST = '_generated.json'
+
+# MovieLens 各类型在电影中的大致占比
+GENRES = {
+    'Drama': 0.45, 'Comedy': 0.35, 'Thriller': 0.18, 'Action': 0.17, 'Romance': 0.15, 'Adventure': 0.12,
+    'Crime': 0.11, 'Sci-Fi': 0.09, 'Horror': 0.09, 'Fantasy': 0.07, 'Children': 0.06, 'Animation': 0.05,
+    'Mystery': 0.05, 'Documentary': 0.04, 'War': 0.04, 'Musical': 0.03, 'Western': 0.02, 'IMAX': 0.02,
+    'Film-Noir': 0.01,
+}
+_ADJECTIVES = ('Silent', 'Last', 'Dark', 'Golden', 'Lost', 'Hidden', 'Broken', 'Final', 'Secret', 'Wild',
+               'Crimson', 'Eternal', 'Frozen', 'Burning', 'Little', 'Midnight', 'Forgotten', 'Electric',
+               'Savage', 'Quiet', 'Brave', 'Lonely', 'Distant', 'Perfect', 'Strange', 'Deadly', 'Sweet')
+_NOUNS = ('River', 'City', 'Night', 'Heart', 'Kingdom', 'Road', 'Storm', 'Island', 'Dream', 'Garden',
+          'Empire', 'Shadow', 'Mountain', 'Summer', 'Promise', 'Stranger', 'Machine', 'Mirror', 'Ocean',
+          'Planet', 'Detective', 'Wedding', 'Highway', 'Winter', 'Legend', 'Circus', 'Tower', 'Voyage')
+_SUFFIXES = ('', '', '', ' II', ' Returns', ': The Beginning', ' in Paris', ' of the Dead', ' Forever')
+
+
+def scale_dir(scale, root=os.path.join('benchmarks', 'data')):
+    return os.path.join(root, scale)
+
+
+def generate(scale, output=None, seed=42, log=print):
+    """🧪 生成一个规模的数据到 ``output``（默认 ``benchmarks/data/<scale>``），已生成时直接返回目录"""
+    if scale not in SCALES:
+        raise ValueError(f"未知的规模: {scale}（可选 {', '.join(SCALES)}）")
+    output = output or scale_dir(scale)
+    manifest = {'scale': scale, 'seed': seed, 'version': GENERATOR_VERSION}
+    manifest_path = os.path.join(output, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            if json.load(f) == manifest:
+                return output
+
+    n_ratings, n_users, n_movies = SCALES[scale]
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    movies = generate_movies(rng, n_movies)
+    ratings = generate_ratings(rng, n_ratings, n_users, movies['movieId'].to_numpy())
+    log(f"🧪 {scale}: {len(ratings):,} 条评分 / {n_users:,} 位用户 / {n_movies:,} 部电影，"
+        f"生成用时 {time.perf_counter() - started:.1f}s")
+
+    os.makedirs(output, exist_ok=True)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    movies.to_csv(os.path.join(output, 'movies.csv'), index=False)
+    _write_ratings(ratings, os.path.join(output, 'ratings.csv'))
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    log(f"💾 已写入 {output}，总用时 {time.perf_counter() - started:.1f}s")
+    return output
+
+
+def generate_movies(rng, n_movies):
+    """🎬 movieId（升序、有间隔）、带年份的标题与 '|' 分隔的类型"""
+    movie_ids = np.sort(rng.choice(np.arange(2, 3 * n_movies), size=n_movies - 1, replace=False))
+    movie_ids = np.concatenate([[1], movie_ids])
+    # 年份偏向近几十年
+    years = np.clip(2018 - rng.exponential(18, n_movies).astype(int), 1902, 2018)
+
+    adjectives = rng.integers(len(_ADJECTIVES), size=n_movies)
+    nouns = rng.integers(len(_NOUNS), size=n_movies)
+    suffixes = rng.integers(len(_SUFFIXES), size=n_movies)
+    serial = rng.integers(1, 40, size=n_movies)
+    article = rng.random(n_movies) < 0.15
+    titles = []
+    for i in range(n_movies):
+        name = f"{_ADJECTIVES[adjectives[i]]} {_NOUNS[nouns[i]]}{_SUFFIXES[suffixes[i]]}"
+        if serial[i] > 30:
+            name = f"{name} {serial[i]}"
+        titles.append(f"{name}, The ({years[i]})" if article[i] else f"{name} ({years[i]})")
+
+    names = list(GENRES)
+    chosen = rng.random((n_movies, len(names))) < np.array(list(GENRES.values()))
+    genres = ['|'.join(name for name, pick in zip(names, row) if pick) or '(no genres listed)' for row in chosen]
+    return pd.DataFrame({'movieId': movie_ids, 'title': titles, 'genres': genres})
+
+
+def generate_ratings(rng, n_ratings, n_users, movie_ids):
+    """⭐ 按 userId、movieId 排序的评分明细，(用户, 电影) 不重复"""
+    n_movies = len(movie_ids)
+    counts = _user_counts(rng, n_ratings, n_users, cap=n_movies // 2)
+
+    # 电影热度：Zipf 长尾，热度顺序与 movieId 无关
+    popularity = 1.0 / (np.arange(n_movies) + 10.0) ** 1.1
+    popularity = popularity[rng.permutation(n_movies)]
+    cdf = np.cumsum(popularity / popularity.sum())
+
+    # 评分多的用户按热度不放回抽样（指数分布键取最小的 count 个，Efraimidis–Spirakis）；其余用户
+    # 有放回地多抽一些，按抽取顺序保留每位用户前 count 部不重复的电影（即逐次抽取、重复则重抽）
+    heavy = np.flatnonzero(counts > n_movies // 20)
+    keys = [user * n_movies + np.argpartition(rng.exponential(size=n_movies) / popularity, counts[user])[:counts[user]]
+            for user in heavy.tolist()]
+    keys = np.sort(np.concatenate(keys + [np.zeros(0, dtype=np.int64)]))
+    missing = counts.copy()
+    missing[heavy] = 0
+    while missing.any():
+        users = np.repeat(np.arange(n_users, dtype=np.int64), missing + missing // 2 + 2)
+        draws = users * n_movies + np.minimum(np.searchsorted(cdf, rng.random(len(users))), n_movies - 1)
+        if len(keys):
+            draws = draws[keys[np.minimum(np.searchsorted(keys, draws), len(keys) - 1)] != draws]
+        _, first = np.unique(draws, return_index=True)
+        draws = draws[np.sort(first)]
+        owner = draws // n_movies
+        rank = np.arange(len(draws)) - np.searchsorted(owner, owner)
+        draws = draws[rank < missing[owner]]
+        keys = np.sort(np.concatenate([keys, draws]))
+        missing -= np.bincount(draws // n_movies, minlength=n_users)
+    user_code, movie_code = keys // n_movies, keys % n_movies
+
+    user_bias = rng.normal(0, 0.45, n_users)
+    movie_bias = rng.normal(0, 0.5, n_movies) + 0.15 * np.log(popularity / popularity.mean())
+    raw = 3.5 + user_bias[user_code] + movie_bias[movie_code] + rng.normal(0, 0.9, len(keys))
+    half_stars = rng.random(n_users) < 0.5
+    rating = np.where(half_stars[user_code], np.round(raw * 2) / 2, np.round(raw))
+    rating = np.clip(rating, np.where(half_stars[user_code], 0.5, 1.0), 5.0)
+
+    # 每位用户在一段时间内陆续评分：1996 年到 2018 年之间
+    start = rng.integers(828_000_000, 1_500_000_000, n_users)
+    span = rng.exponential(86_400 * 200, n_users).astype(np.int64)
+    timestamp = start[user_code] + (rng.random(len(keys)) * span[user_code]).astype(np.int64)
+    return pd.DataFrame({
+        'userId': (user_code + 1).astype(np.int32),
+        'movieId': movie_ids[movie_code].astype(np.int32),
+        'rating': rating.astype(np.float32),
+        'timestamp': np.minimum(timestamp, 1_537_799_250),
+    })
+
+
+def _user_counts(rng, n_ratings, n_users, cap):
+    """每位用户的评分数：至少 MIN_USER_RATINGS、至多 ``cap``，总和为 ``n_ratings``"""
+    weights = rng.lognormal(0, 1.2, n_users)
+    extra = n_ratings - MIN_USER_RATINGS * n_users
+    counts = MIN_USER_RATINGS + np.floor(weights / weights.sum() * extra).astype(np.int64)
+    counts[np.argsort(-weights)[:n_ratings - counts.sum()]] += 1
+    for _ in range(100):
+        over = np.maximum(counts - cap, 0)
+        if not over.any():
+            break
+        counts -= over
+        room = cap - counts
+        counts += np.floor(room / room.sum() * over.sum()).astype(np.int64)
+        counts[np.argsort(-room)[:n_ratings - counts.sum()]] += 1
+    return counts
+
+
+def _write_ratings(ratings, path, chunk=2_000_000):
+    """分块写出，评分保留一位小数（同 MovieLens）"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write('userId,movieId,rating,timestamp\n')
+        for start in range(0, len(ratings), chunk):
+            ratings.iloc[start:start + chunk].to_csv(f, header=False, index=False, float_format='%.1f')
+    os.replace(tmp_path, path)
@@ -0,0 +1,184 @@
+"""🧑‍🤝‍🧑 界面负载测试 - 用 Streamlit AppTest（无需浏览器）模拟多个会话
+
+Streamlit 每次控件交互都会把 ``app.py`` 从头执行一遍。这里每个模拟会话是一个 :class:`AppTest`，
+按随机顺序逐页操作：打开页面，再做该页的典型交互（选电影并获取推荐、切换类型、搜索、分析用户、
+随机发现），每次交互触发的重新运行单独计时。
+
+AppTest 每次运行都会替换进程全局的 Streamlit 运行时，同一进程内的多个 AppTest 不能同时运行，
+因此每个会话在独立的进程中运行，N 个会话并发争用 CPU。各进程有自己的 ``st.cache_data`` /
+``st.cache_resource``，第一次运行（加载数据、构建索引）单独记为“启动”；之后的重新运行与真实部署中
+缓存已命中的会话相同。报告每个 (页面, 操作) 的耗时分位数，以及各会话进程常驻内存（RSS）
+在该页面上的平均增长。
+"""
+import os
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import streamlit.config
+import streamlit.logger
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.suite import environment, timing_stats
+
+APP_PATH = 'app.py'
+# 单次重新运行的超时秒数（第一次运行要加载数据）
+TIMEOUT = 300
+SEARCH_TERMS = ('matrix', 'star wars', 'toy story', 'godfather', 'alien', 'love', 'the dark')
+STARTUP = '🚀 启动'
+
+
+def _pick_movie(at, rng):
+    movie = at.selectbox[0]
+    movie.select_index(rng.randrange(len(movie.options)))
+
+
+def _pick_genre(at, rng):
+    genre = at.selectbox[0]
+    genre.set_value(rng.choice(genre.options[1:]))
+
+
+def _search(at, rng):
+    at.text_input[0].input(rng.choice(SEARCH_TERMS))
+
+
+def _analyze_user(at, rng):
+    user = at.number_input[0]
+    user.set_value(rng.randint(int(user.min), int(user.max)))
+    _click('分析用户')(at, rng)
+
+
+def _click(label):
+    def click(at, rng):
+        next(button for button in at.button if label in button.label).click()
+    return click
+
+
+# 页面 → 打开页面后依次执行的 (操作名, 设置控件状态的函数)，每个操作触发一次重新运行
+PAGES = {
+    '🎯 个性化推荐': (('选择电影', _pick_movie), ('获取推荐', _click('获取个性化推荐'))),
+    '🏆 热门电影': (('切换类型', _pick_genre),),
+    '🔍 电影搜索': (('搜索', _search),),
+    '📊 数据分析': (),
+    '👤 用户分析': (('分析用户', _analyze_user),),
+    '🎲 随机发现': (('随机推荐', _click('随机发现精彩')),),
+}
+
+
+def rss_mb():
+    """📏 当前进程的常驻内存（MB）；没有 /proc 时退回到历史峰值"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Session:
+    """🧑 一个模拟会话：逐页操作，``records`` 为每次重新运行的 (页面, 操作, 秒数, 内存增长, 错误)"""
+
+    def __init__(self, app_path, session_id, seed, timeout):
+        self.id = session_id
+        self.rng = random.Random(seed * 1000 + session_id)
+        # 相对路径由 AppTest 按调用方文件解析，这里先按当前目录转为绝对路径
+        self.at = AppTest.from_file(os.path.abspath(app_path), default_timeout=timeout)
+        self.records = []
+
+    def record(self, page, action, seconds, rss_delta, errors):
+        self.records.append({'session': self.id, 'page': page, 'action': action, 'seconds': seconds,
+                             'rss_delta': rss_delta, 'errors': errors})
+
+    def rerun(self, page, action):
+        before = rss_mb()
+        started = time.perf_counter()
+        self.at.run()
+        seconds = time.perf_counter() - started
+        errors = [str(error.value) for error in self.at.exception]
+        self.record(page, action, seconds, rss_mb() - before, errors)
+
+    def run(self, rounds):
+        self.rerun(STARTUP, '首次运行')
+        for _ in range(rounds):
+            pages = list(PAGES)
+            self.rng.shuffle(pages)
+            for page in pages:
+                try:
+                    self.at.sidebar.button(key=f'nav_{page}').click()
+                    self.rerun(page, '打开页面')
+                    for action, prepare in PAGES[page]:
+                        prepare(self.at, self.rng)
+                        self.rerun(page, action)
+                except Exception as error:  # 页面没有渲染出预期的控件：记为错误，继续下一页
+                    self.record(page, '脚本', 0.0, 0.0, [f'{type(error).__name__}: {error}'])
+        return self.records
+
+
+def _simulate(task):
+    """在工作进程中运行一个会话，返回它的记录与结束时的常驻内存"""
+    app_path, session_id, rounds, seed, timeout = task
+    # 否则 Streamlit 每次运行都会在终端打印弃用提示等警告；先解析配置，免得解析时重置日志级别
+    streamlit.config.get_config_options()
+    streamlit.logger.set_log_level('error')
+    records = Session(app_path, session_id, seed, timeout).run(rounds)
+    return records, rss_mb()
+
+
+def run_load_test(app_path=APP_PATH, sessions=4, rounds=2, seed=42, timeout=TIMEOUT, log=print):
+    """🧑‍🤝‍🧑 ``sessions`` 个会话并发各执行 ``rounds`` 轮全部页面，返回可保存为 JSON 的结果
+
+    ``benchmarks`` 以 "页面 · 操作" 为键（可用 :func:`~benchmarks.suite.compare` 对比两次运行），
+    ``pages`` 为按页面汇总的耗时分位数与内存增长，``errors`` 为出错的重新运行，
+    ``meta.rss_end_mb`` 为每个会话进程结束时的常驻内存。
+    """
+    tasks = [(app_path, session_id, rounds, seed, timeout) for session_id in range(sessions)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=sessions) as pool:
+        finished = list(pool.map(_simulate, tasks))
+    elapsed = time.perf_counter() - started
+    records = [record for session_records, _ in finished for record in session_records]
+    rss_end = [rss for _, rss in finished]
+
+    frame = pd.DataFrame(records)
+    timed = frame[frame['action'] != '脚本']
+    # 内存增长为各会话在该页面（操作）上的常驻内存增量之和，再按会话数平均
+    benchmarks = {
+        f'{page} · {action}': dict(timing_stats(group['seconds'].tolist()),
+                                   rss_growth_mb=float(group['rss_delta'].sum()) / sessions)
+        for (page, action), group in timed.groupby(['page', 'action'], sort=False)
+    }
+    pages = {
+        page: dict(timing_stats(group['seconds'].tolist()),
+                   rss_growth_mb=float(group['rss_delta'].sum()) / sessions)
+        for page, group in timed.groupby('page', sort=False)
+    }
+    errors = [{'page': row.page, 'action': row.action, 'error': error}
+              for row in frame.itertuples() for error in row.errors]
+
+    log(f"🧑‍🤝‍🧑 {sessions} 个会话 × {rounds} 轮，{len(timed)} 次重新运行，用时 {elapsed:.1f}s，"
+        f"每个会话结束时常驻内存 {min(rss_end):.0f}–{max(rss_end):.0f} MB，错误 {len(errors)} 个")
+    table = pd.DataFrame(pages).T[['repeat', 'median', 'p90', 'p99', 'max', 'rss_growth_mb']]
+    table[['median', 'p90', 'p99', 'max']] *= 1000
+    log(table.rename(columns={'repeat': 'reruns', 'median': 'p50_ms', 'p90': 'p90_ms', 'p99': 'p99_ms',
+                              'max': 'max_ms'}).round(1).to_string())
+    for error in errors[:5]:
+        log(f"❌ {error['page']} · {error['action']}: {error['error'][:200]}")
+
+    return {
+        'meta': {
+            'kind': 'load-test',
+            'app': app_path,
+            'sessions': sessions,
+            'rounds': rounds,
+            'seed': seed,
+            'seconds': elapsed,
+            'reruns': len(timed),
+            'rss_end_mb': rss_end,
+            **environment(),
+        },
+        'benchmarks': benchmarks,
+        'pages': pages,
+        'errors': errors,
+    }
+
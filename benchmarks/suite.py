@@ -0,0 +1,302 @@
+"""⏱️ 推荐引擎基准测试 - 每个引擎函数的耗时与峰值内存
+
+每项基准先预热，再计时 ``repeat`` 次（取最小值 / 中位数 / 平均值 / 分位数 / 最大值），最后在 tracemalloc
+下单独运行一次记录峰值内存（numpy / scipy 的数组分配都会计入；计时的那几次不开启 tracemalloc，
+避免它的开销混进耗时）。查询类基准每次运行换一个查询对象（电影、用户、搜索词轮流取），
+查询对象由数据按固定规则选出，同一份数据的两次运行完全相同。
+
+结果保存为 JSON：``meta`` 记录规模、数据量、软件版本与机器信息，``benchmarks`` 为每项基准的统计，
+:func:`compare` 对比两份结果。
+"""
+import fnmatch
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import scipy
+
+from recommender.als import ALSModel
+from recommender.ann import RandomProjectionIndex
+from recommender.data import load_movie_data
+from recommender.engine import (
+    get_als_recommendations, get_movie_rating_stats, get_movie_recommendations, get_random_recommendations,
+    get_seed_recommendations, get_top_movies_by_genre, get_user_knn_recommendations, get_user_rating_stats,
+    get_user_recommendations, search_movies,
+)
+from recommender.neighbors import NeighborIndex
+from recommender.search import TitleIndex
+from recommender.similarity import PearsonSimilarity
+from recommender.user_knn import UserKNN
+
+# 轮流使用的查询对象个数
+QUERIES = 8
+# 超过该比例视为变慢 / 变快
+THRESHOLD = 0.10
+
+
+class Context:
+    """🧰 基准共用的数据、索引与查询对象；索引在第一次用到时构建（不计入使用它的基准）"""
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        # 读取一次（同时写好快照，load.snapshot 测的是快照命中的路径）
+        self.data = load_movie_data(data_dir)
+        self._indexes = {}
+
+        movies = self.data.movies
+        popular = movies[movies['ratings_count'] >= 100].sort_values('ratings_count', ascending=False)
+        popular = popular if len(popular) >= QUERIES else movies.sort_values('ratings_count', ascending=False)
+        self.movie_ids = _spread(popular.index.tolist(), QUERIES)
+        self.user_ids = _spread(self.data.users.user_ids.tolist(), QUERIES)
+        titles = movies.loc[self.movie_ids, 'title'].tolist()
+        # 完整标题、前缀与少一个字母的拼写错误轮流出现
+        self.search_terms = [[title, title[:5], title[:3] + title[4:12]][i % 3] for i, title in enumerate(titles)]
+        self.genres = _spread([name for name in self.data.genre_index.genres if not name.startswith('(')], QUERIES)
+
+    def index(self, name):
+        if name not in self._indexes:
+            self._indexes[name] = BUILDERS[name](self)
+        return self._indexes[name]
+
+
+def _spread(values, n):
+    """从有序列表中均匀取 n 个（不足 n 个时全部取）"""
+    if len(values) <= n:
+        return list(values)
+    return [values[i] for i in np.linspace(0, len(values) - 1, n).astype(int)]
+
+
+# 索引构建函数：既是 build.* 基准的被测函数，也为查询类基准提供索引
+BUILDERS = {
+    'similarity': lambda ctx: PearsonSimilarity(ctx.data.movie_matrix),
+    'neighbors': lambda ctx: NeighborIndex.build(ctx.data.movie_matrix, ctx.data.movies['ratings_count'],
+                                                 similarity=ctx.index('similarity')),
+    'ann': lambda ctx: RandomProjectionIndex(ctx.index('similarity')),
+    'title_index': lambda ctx: TitleIndex(ctx.data.movies.index, ctx.data.movies['title'],
+                                          ctx.data.movies['ratings_count']),
+    'user_knn': lambda ctx: UserKNN(ctx.data.movie_matrix),
+    'als': lambda ctx: ALSModel.train(ctx.data.movie_matrix, factors=32, iterations=3),
+}
+
+
+def _build(name):
+    def setup(ctx):
+        if name == 'neighbors' or name == 'ann':
+            ctx.index('similarity')
+        return lambda i: BUILDERS[name](ctx)
+    return setup
+
+
+def _similar(method):
+    def setup(ctx):
+        data = ctx.data
+        indexes = {'similarity': ctx.index('similarity')}
+        if method == 'index':
+            indexes['neighbor_index'] = ctx.index('neighbors')
+        elif method == 'ann':
+            indexes['ann_index'] = ctx.index('ann')
+        return lambda i: get_movie_recommendations(ctx.movie_ids[i % len(ctx.movie_ids)], data.movie_matrix,
+                                                   data.movies, min_ratings=50, method=method, **indexes)
+    return setup
+
+
+def _seeds(ctx):
+    similarity = ctx.index('similarity')
+    seeds = [{movie_id: 1.0 for movie_id in ctx.movie_ids[i:i + 3]} | {ctx.movie_ids[i - 1]: -1.0}
+             for i in range(len(ctx.movie_ids))]
+    return lambda i: get_seed_recommendations(seeds[i % len(seeds)], ctx.data.movies, similarity, min_ratings=50)
+
+
+def _user(method):
+    def setup(ctx):
+        data = ctx.data
+        if method == 'item':
+            similarity = ctx.index('similarity')
+            return lambda i: get_user_recommendations(ctx.user_ids[i % len(ctx.user_ids)], data.users,
+                                                      data.movies, similarity, min_ratings=50)
+        if method == 'user':
+            user_knn = ctx.index('user_knn')
+            return lambda i: get_user_knn_recommendations(ctx.user_ids[i % len(ctx.user_ids)], data.movie_matrix,
+                                                          data.movies, user_knn, min_ratings=50)
+        als = ctx.index('als')
+        return lambda i: get_als_recommendations(ctx.user_ids[i % len(ctx.user_ids)], data.movie_matrix,
+                                                 data.movies, als, min_ratings=50)
+    return setup
+
+
+def _search(ctx):
+    title_index = ctx.index('title_index')
+    return lambda i: search_movies(title_index, ctx.search_terms[i % len(ctx.search_terms)])
+
+
+# 名称 → (准备函数, 是否预热)；准备函数返回以运行序号为参数的被测函数
+BENCHMARKS = {
+    'load.csv': (lambda ctx: lambda i: load_movie_data(ctx.data_dir, use_snapshot=False), False),
+    'load.snapshot': (lambda ctx: lambda i: load_movie_data(ctx.data_dir), False),
+    'build.similarity': (_build('similarity'), False),
+    'build.neighbors': (_build('neighbors'), False),
+    'build.ann': (_build('ann'), False),
+    'build.title_index': (_build('title_index'), False),
+    'build.user_knn': (_build('user_knn'), False),
+    'build.als': (_build('als'), False),
+    'similar.pearson': (_similar('pearson'), True),
+    'similar.index': (_similar('index'), True),
+    'similar.ann': (_similar('ann'), True),
+    'similar.seeds': (_seeds, True),
+    'user.item': (_user('item'), True),
+    'user.knn': (_user('user'), True),
+    'user.als': (_user('als'), True),
+    'rating_stats': (lambda ctx: lambda i: get_movie_rating_stats(ctx.data.movies, 50), True),
+    'top_by_genre': (lambda ctx: lambda i: get_top_movies_by_genre(
+        ctx.data.movies, ctx.data.genre_index, ctx.genres[i % len(ctx.genres)]), True),
+    'search': (_search, True),
+    'user_profile': (lambda ctx: lambda i: get_user_rating_stats(
+        ctx.data.users, ctx.user_ids[i % len(ctx.user_ids)]), True),
+    'random_picks': (lambda ctx: lambda i: get_random_recommendations(ctx.data.movies, seed=i), True),
+}
+
+
+def select(only=None, skip=None):
+    """🔖 按通配符（如 ``'user.*'``）选出要运行的基准，保持定义顺序"""
+    names = [name for name in BENCHMARKS if not only or any(fnmatch.fnmatch(name, p) for p in only)]
+    return [name for name in names if not skip or not any(fnmatch.fnmatch(name, p) for p in skip)]
+
+
+def measure(call, repeat=5, warmup=True):
+    """⏱️ 计时 ``repeat`` 次并在 tracemalloc 下再运行一次，返回耗时统计（秒）与峰值内存（MB）"""
+    if warmup:
+        call(0)
+    seconds = []
+    for i in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        call(i + 1)
+        seconds.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        call(0)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return dict(timing_stats(seconds), peak_mb=peak / 1024 ** 2)
+
+
+def timing_stats(seconds):
+    """📈 一组耗时（秒）的次数、最小值、中位数、平均值、p90 / p99 与最大值"""
+    p90, p99 = np.percentile(seconds, [90, 99]).tolist()
+    return {
+        'repeat': len(seconds),
+        'min': min(seconds),
+        'median': statistics.median(seconds),
+        'mean': statistics.fmean(seconds),
+        'p90': p90,
+        'p99': p99,
+        'max': max(seconds),
+    }
+
+
+def run(data_dir, scale=None, repeat=5, only=None, skip=None, log=print):
+    """⏱️ 运行选中的基准，返回可直接保存为 JSON 的结果"""
+    started = time.perf_counter()
+    ctx = Context(data_dir)
+    log(f"📦 {ctx.data.n_ratings:,} 条评分，{ctx.data.movie_matrix.n_users:,} 位用户，"
+        f"{ctx.data.movie_matrix.n_items:,} 部电影，加载用时 {time.perf_counter() - started:.1f}s")
+
+    results = {}
+    for name in select(only, skip):
+        setup, warmup = BENCHMARKS[name]
+        # 加载与构建每次要几秒到几分钟，最多计时 3 次
+        stats = measure(setup(ctx), repeat if warmup else min(repeat, 3), warmup)
+        results[name] = stats
+        log(f"⏱️ {name:<18} 中位数 {_format_seconds(stats['median']):>9}  "
+            f"最小 {_format_seconds(stats['min']):>9}  峰值内存 {stats['peak_mb']:8.1f} MB")
+
+    return {'meta': metadata(ctx, scale, repeat), 'benchmarks': results}
+
+
+def metadata(ctx, scale, repeat):
+    """🖥️ 结果的背景信息：比较两次运行前先确认它们可比"""
+    return {
+        'scale': scale,
+        'data_dir': ctx.data_dir,
+        'ratings': ctx.data.n_ratings,
+        'users': int(ctx.data.movie_matrix.n_users),
+        'movies': int(ctx.data.movie_matrix.n_items),
+        'fingerprint': ctx.data.movie_matrix.fingerprint,
+        'repeat': repeat,
+        **environment(),
+    }
+
+
+def environment():
+    """🖥️ 运行时间、git 提交、软件版本与机器信息"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scipy': scipy.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        # 整个进程的最大常驻内存（Linux 上单位为 KB）
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def save(results, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base, new, threshold=THRESHOLD):
+    """📐 对比两份结果的中位耗时与内存，返回 (对比表, 变慢的基准名列表)
+
+    ratio 为 新 / 旧 的中位耗时，超过 1 + ``threshold`` 记为变慢，低于 1 - ``threshold`` 记为变快。
+    内存列为峰值内存（基准测试）或常驻内存增长（负载测试）。只在一份结果中出现的基准不参与对比。
+    """
+    rows = []
+    for name, old in base['benchmarks'].items():
+        current = new['benchmarks'].get(name)
+        if current is None:
+            continue
+        ratio = current['median'] / old['median'] if old['median'] > 0 else float('inf')
+        verdict = '🐢 变慢' if ratio > 1 + threshold else '🚀 变快' if ratio < 1 - threshold else ''
+        rows.append({'benchmark': name, 'base_ms': old['median'] * 1000, 'new_ms': current['median'] * 1000,
+                     'ratio': ratio, 'base_mb': _memory(old), 'new_mb': _memory(current), 'verdict': verdict})
+    table = pd.DataFrame(rows, columns=['benchmark', 'base_ms', 'new_ms', 'ratio', 'base_mb', 'new_mb',
+                                        'verdict']).set_index('benchmark')
+    return table, table.index[table['ratio'] > 1 + threshold].tolist()
+
+
+def _memory(stats):
+    return stats.get('peak_mb', stats.get('rss_growth_mb'))
+
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:.2f}ms" if seconds < 1 else f"{seconds:.2f}s"
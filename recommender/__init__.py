@@ -0,0 +1,15 @@
+"""🎬 电影推荐引擎 - 数据结构与推荐算法"""
+from recommender.ann import RandomProjectionIndex
+from recommender.engine import Engine
+from recommender.genres import GenreIndex
+from recommender.matrix import RatingMatrix
+from recommender.neighbors import NeighborIndex
+from recommender.progress import Progress
+from recommender.search import TitleIndex
+from recommender.similarity import PearsonSimilarity
+from recommender.users import UserIndex
+
+__all__ = [
+    'Engine', 'GenreIndex', 'NeighborIndex', 'PearsonSimilarity', 'Progress', 'RandomProjectionIndex',
+    'RatingMatrix', 'TitleIndex', 'UserIndex',
+]
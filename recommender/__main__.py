@@ -0,0 +1,217 @@
+"""🛠️ 推荐引擎命令行工具
+
+    python -m recommender build-neighbors --k 100 --min-ratings 50
+    python -m recommender compare "Toy Story (1995)" "Heat (1995)"
+    python -m recommender ann-recall --dims 256 --candidates 25 50 100 200
+    python -m recommender batch movies --output data/batch/similar --workers 8 --top-n 20
+    python -m recommender serve --port 8000 --writable --follow data/ratings.csv
+    python -m recommender train-als --factors 64 --iterations 15
+    python -m recommender memory --budget 600M
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from recommender.als import ALS_MODEL_PATH, ALSModel
+from recommender.ann import RandomProjectionIndex, measure_recall
+from recommender.batch import FORMATS, KINDS, run_batch
+from recommender.cache import ResultCache
+from recommender.data import DATA_DIR, load_movie_data
+from recommender.engine import INDEXES, Engine
+from recommender.memory import MEMORY_BUDGET, log_usage, parse_bytes
+from recommender.neighbors import NEIGHBOR_INDEX_PATH, NeighborIndex
+from recommender.service import FOLLOW_INTERVAL, RecommendationService
+from recommender.similarity import PearsonSimilarity, corrwith_reference
+
+
+def load_matrix(data_dir):
+    """📦 读取评分矩阵与每部电影的评分数"""
+    data = load_movie_data(data_dir)
+    return data.movie_matrix, data.movies['ratings_count']
+
+
+def build_neighbors(args):
+    """🧭 构建并保存近邻索引"""
+    movie_matrix, item_counts = load_matrix(args.data_dir)
+    started = time.perf_counter()
+    index = NeighborIndex.build(movie_matrix, item_counts, k=args.k,
+                                min_ratings=args.min_ratings, log=print)
+    index.save(args.output)
+    print(f"✅ 已写入 {args.output}（{movie_matrix.n_items} 部电影，K={args.k}，"
+          f"用时 {time.perf_counter() - started:.1f}s）")
+
+
+def compare(args):
+    """📐 对比向量化皮尔逊与 pandas corrwith 的结果"""
+    data = load_movie_data(args.data_dir)
+    movie_matrix = data.movie_matrix
+    engine = PearsonSimilarity(movie_matrix)
+
+    for title in args.titles:
+        movie_ids = data.by_title.get(title, ())
+        if len(movie_ids) == 0:
+            print(f"❓ {title}: 未找到")
+        for movie_id in movie_ids:
+            started = time.perf_counter()
+            fast = engine.similar_items(movie_id)
+            fast_time = time.perf_counter() - started
+            started = time.perf_counter()
+            slow = corrwith_reference(movie_matrix, movie_id)
+            slow_time = time.perf_counter() - started
+
+            joined = fast.join(slow, how='outer', lsuffix='_pearson', rsuffix='_corrwith')
+            diff = (joined['correlation_pearson'] - joined['correlation_corrwith']).abs().max()
+            missing = joined[['correlation_pearson', 'correlation_corrwith']].isna().any(axis=1).sum()
+            support_match = (joined['support_pearson'] == joined['support_corrwith']).all()
+            print(f"🎬 {data.label(movie_id)}: {len(fast)} 部相关电影，最大差异 {diff:.2e}，"
+                  f"仅一侧存在 {missing} 部，共同评分数{'一致' if support_match else '不一致'}；"
+                  f"向量化 {fast_time * 1000:.1f}ms / corrwith {slow_time * 1000:.1f}ms")
+
+
+def ann_recall(args):
+    """🛰️ 测量近似近邻索引在不同候选数下的召回率与延迟"""
+    movie_matrix, _ = load_matrix(args.data_dir)
+    started = time.perf_counter()
+    ann = RandomProjectionIndex(PearsonSimilarity(movie_matrix), dims=args.dims,
+                                min_ratings=args.min_ratings, seed=args.seed)
+    print(f"🛰️ 已索引 {len(ann.indexed)} 部电影，{args.dims} 维，"
+          f"构建用时 {time.perf_counter() - started:.2f}s，占用 {ann.nbytes / 1024 ** 2:.1f} MB")
+
+    rng = np.random.default_rng(args.seed)
+    codes = rng.choice(ann.indexed, size=min(args.sample, len(ann.indexed)), replace=False)
+    report = measure_recall(ann, codes, k=args.k, candidates=args.candidates)
+    print(report.round(3).to_string())
+
+
+def batch(args):
+    """🏭 为全部电影 / 全部用户预计算推荐并报告吞吐量"""
+    report = run_batch(args.kind, args.output, data_dir=args.data_dir, workers=args.workers,
+                       shard_size=args.shard_size, fmt=args.format, resume=not args.no_resume,
+                       min_ratings=args.min_ratings, threshold=args.threshold, top_n=args.top_n,
+                       method=args.method, user_method=args.user_method)
+    print(f"✅ {report['items']} 条，用时 {report['seconds']:.1f}s，{report['items_per_second']:.1f} 条/s"
+          f"（跳过 {report['skipped_shards']} 个已完成分片）")
+    for pid, stats in sorted(report['workers'].items()):
+        print(f"   进程 {pid}: {stats['items']} 条，计算 {stats['seconds']:.1f}s，"
+              f"{stats['items_per_second']:.1f} 条/s")
+
+
+def train_als(args):
+    """🧮 训练并保存矩阵分解模型"""
+    movie_matrix, _ = load_matrix(args.data_dir)
+    started = time.perf_counter()
+    model = ALSModel.train(movie_matrix, factors=args.factors, iterations=args.iterations,
+                           regularization=args.regularization, implicit=args.implicit, alpha=args.alpha,
+                           threads=args.threads, seed=args.seed, log=print)
+    model.save(args.output)
+    print(f"✅ 已写入 {args.output}（{movie_matrix.n_users} 位用户 × {movie_matrix.n_items} 部电影，"
+          f"{args.factors} 维，{model.nbytes / 1024 ** 2:.1f} MB，用时 {time.perf_counter() - started:.1f}s）")
+
+
+def serve(args):
+    """🌐 启动 JSON API 服务"""
+    started = time.perf_counter()
+    data = load_movie_data(args.data_dir)
+    # 设置了内存预算时，结果缓存不超过预算剩余的空间
+    cache_bytes = args.cache_mb * 1024 ** 2
+    if data.plan.budget is not None:
+        cache_bytes = min(cache_bytes, data.plan.cache_bytes)
+    cache = ResultCache(cache_bytes, ttl=args.cache_ttl) if cache_bytes > 0 else None
+    service = RecommendationService(Engine(data, cache=cache), workers=args.workers,
+                                    batch_window=args.batch_window_ms / 1000, writable=args.writable)
+    print(f"📦 数据与索引已就绪，用时 {time.perf_counter() - started:.1f}s")
+    log_usage(service.engine.memory_usage(), data.plan, log=print)
+    def ready(address):
+        print(f"🌐 正在监听 http://{address[0]}:{address[1]}", flush=True)
+
+    try:
+        asyncio.run(service.serve(args.host, args.port, ready, follow=args.follow,
+                                  follow_interval=args.follow_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+def memory(args):
+    """💾 按内存预算加载数据、构建全部索引，输出选用的表示与各结构的实际占用"""
+    engine = Engine.load(args.data_dir, budget=parse_bytes(args.budget)).warm(INDEXES)
+    log_usage(engine.memory_usage(), engine.data.plan, log=print)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m recommender', description='🎬 推荐引擎命令行工具')
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    neighbors = commands.add_parser('build-neighbors', help='构建电影近邻索引')
+    neighbors.add_argument('--output', default=NEIGHBOR_INDEX_PATH)
+    neighbors.add_argument('--k', type=int, default=100, help='每部电影保留的近邻数')
+    neighbors.add_argument('--min-ratings', type=int, default=50, help='近邻电影的最小评分数')
+    neighbors.set_defaults(handler=build_neighbors)
+
+    diff = commands.add_parser('compare', help='对比向量化皮尔逊与 pandas corrwith 的结果')
+    diff.add_argument('titles', nargs='+')
+    diff.set_defaults(handler=compare)
+
+    recall = commands.add_parser('ann-recall', help='测量近似近邻索引的召回率与延迟')
+    recall.add_argument('--dims', type=int, default=256, help='投影维数')
+    recall.add_argument('--candidates', type=int, nargs='+', default=[25, 50, 100, 200],
+                        help='进入精确重排序的候选数')
+    recall.add_argument('--min-ratings', type=int, default=50, help='被索引电影的最小评分数')
+    recall.add_argument('--k', type=int, default=10, help='recall@k 的 k')
+    recall.add_argument('--sample', type=int, default=200, help='抽样查询的电影数')
+    recall.add_argument('--seed', type=int, default=42)
+    recall.set_defaults(handler=ann_recall)
+
+    runner = commands.add_parser('batch', help='为全部电影或全部用户预计算推荐')
+    runner.add_argument('kind', choices=KINDS, help='movies：相似电影；users：为用户推荐')
+    runner.add_argument('--output', required=True, help='输出目录（每个分片一个文件）')
+    runner.add_argument('--format', choices=FORMATS, default='jsonl', help='parquet 需要安装 pyarrow')
+    runner.add_argument('--workers', type=int, default=None, help='工作进程数，默认为 CPU 核数')
+    runner.add_argument('--shard-size', type=int, default=200, help='每个分片的电影 / 用户数')
+    runner.add_argument('--min-ratings', type=int, default=100, help='推荐电影的最小评分数')
+    runner.add_argument('--threshold', type=float, default=0.0, help='相似电影的最小相关系数')
+    runner.add_argument('--top-n', type=int, default=10, help='每部电影 / 每位用户保留的推荐数')
+    runner.add_argument('--method', choices=['auto', 'index', 'ann', 'pearson'], default='auto',
+                        help='相似电影的计算方法')
+    runner.add_argument('--user-method', choices=['item', 'user', 'als'], default='item',
+                        help='为用户推荐的方式：item 基于物品，user 基于相似用户，als 矩阵分解（需先训练）')
+    runner.add_argument('--no-resume', action='store_true', help='忽略已完成的分片，全部重算')
+    runner.set_defaults(handler=batch)
+
+    als = commands.add_parser('train-als', help='训练矩阵分解（ALS）模型')
+    als.add_argument('--output', default=ALS_MODEL_PATH)
+    als.add_argument('--factors', type=int, default=64, help='因子维数')
+    als.add_argument('--iterations', type=int, default=15, help='交替求解的轮数')
+    als.add_argument('--regularization', type=float, default=0.05, help='正则化系数')
+    als.add_argument('--implicit', action='store_true', help='把评分视为隐式反馈（置信度 1 + α·评分）')
+    als.add_argument('--alpha', type=float, default=40.0, help='隐式模式的置信度系数')
+    als.add_argument('--threads', type=int, default=None, help='求解线程数，默认为 CPU 核数')
+    als.add_argument('--seed', type=int, default=42)
+    als.set_defaults(handler=train_als)
+
+    server = commands.add_parser('serve', help='启动推荐 JSON API 服务')
+    server.add_argument('--host', default='127.0.0.1')
+    server.add_argument('--port', type=int, default=8000)
+    server.add_argument('--workers', type=int, default=4, help='执行批量相似度计算的线程数')
+    server.add_argument('--batch-window-ms', type=float, default=2.0, help='合并并发相似电影查询的时间窗口')
+    server.add_argument('--cache-mb', type=float, default=64, help='相似电影结果缓存的容量，0 表示不缓存')
+    server.add_argument('--cache-ttl', type=float, default=None, help='缓存条目的存活秒数，默认不过期')
+    server.add_argument('--writable', action='store_true', help='开放 POST /ratings 写入新评分')
+    server.add_argument('--follow', default=None, metavar='PATH',
+                        help='跟踪只追加的评分文件（列同 ratings.csv），新行增量写入')
+    server.add_argument('--follow-interval', type=float, default=FOLLOW_INTERVAL, help='跟踪文件的轮询秒数')
+    server.set_defaults(handler=serve)
+
+    accounting = commands.add_parser('memory', help='输出各数据结构的内存占用与预算内选用的表示')
+    accounting.add_argument('--budget', default=MEMORY_BUDGET, help='内存预算（如 600M、1.5G），默认取自 '
+                            'RECOMMENDER_MEMORY_BUDGET，未设置时不限')
+    accounting.set_defaults(handler=memory)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""🛰️ 随机投影近似近邻索引
+
+电影数达到数万时，对每部电影都做精确相关计算开销太大。本模块把中心化的电影评分向量
+随机投影到低维空间并归一化，查询时先用一次稠密矩阵-向量乘积按余弦相似度选出候选，
+再只对候选电影计算精确的成对皮尔逊系数重排序。
+
+电影间的余弦相似度普遍只有 0.3 左右，符号哈希分桶（SimHash）在这个区间碰撞概率很低，
+召回率很差；对低维草图直接做暴力打分在 CPU 上只需几毫秒，召回率高得多。
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+# 构建草图时每批处理的用户数
+USER_BLOCK = 65536
+# 电影数达到该值时启用近似近邻索引
+ANN_MIN_ITEMS = 20000
+# 默认投影维数
+DIMS = 256
+
+
+class RandomProjectionIndex:
+    """🛰️ 电影相似度的近似近邻索引
+
+    召回率与延迟的调节参数：
+
+    - ``dims``（构建时）：投影维数，越高余弦估计越准，打分越慢
+    - ``candidates``（构建时给默认值，查询时可覆盖）：进入精确重排序的候选数，越多召回越高
+
+    只索引评分数不少于 ``min_ratings`` 且评分不全相同的电影；查询的最小评分数低于该值时
+    应回退到精确计算。投影矩阵为 ±1（int8），每位用户只占 ``dims`` 字节。
+    """
+
+    def __init__(self, similarity, dims=DIMS, candidates=100, min_ratings=50, seed=42):
+        self.similarity = similarity
+        self.items = similarity.items
+        self.dims = dims
+        self.n_candidates = candidates
+        self.min_ratings = int(min_ratings)
+
+        counts = np.diff(similarity.mask_t.indptr)
+        norms = np.sqrt(np.asarray(similarity.squared_t.sum(axis=1)).ravel())
+        self.indexed = np.flatnonzero((counts >= min_ratings) & (norms > 0))
+
+        rng = np.random.default_rng(seed)
+        n_users = similarity.centered.shape[0]
+        self.planes = rng.choice(np.array([-1, 1], dtype=np.int8), size=(n_users, dims))
+
+        sketches = np.zeros((similarity.n_items, dims), dtype=np.float32)
+        for start in range(0, n_users, USER_BLOCK):
+            block = slice(start, start + USER_BLOCK)
+            sketches += similarity.centered[block].T @ self.planes[block].astype(np.float32)
+        self.sketches = _normalize(sketches[self.indexed])
+        self._position = np.full(similarity.n_items, -1, dtype=np.int64)
+        self._position[self.indexed] = np.arange(len(self.indexed))
+
+    @property
+    def nbytes(self):
+        return self.planes.nbytes + self.sketches.nbytes + self.indexed.nbytes + self._position.nbytes
+
+    def covers(self, min_ratings):
+        """✅ 该最小评分数下的查询能否由索引回答"""
+        return min_ratings >= self.min_ratings
+
+    def sketch(self, code):
+        """✏️ 第 ``code`` 部电影的归一化投影向量（已索引的直接取用）"""
+        if self._position[code] >= 0:
+            return self.sketches[self._position[code]]
+        row = self.similarity.centered_t[code]
+        sketch = row.data.astype(np.float32) @ self.planes[row.indices].astype(np.float32)
+        return _normalize(sketch[None, :])[0]
+
+    def candidates(self, code, candidates=None):
+        """🎯 投影空间中与第 ``code`` 部电影最接近的已索引电影编码"""
+        candidates = self.n_candidates if candidates is None else candidates
+        scores = self.sketches @ self.sketch(code)
+        if self._position[code] >= 0:
+            scores[self._position[code]] = -np.inf
+        count = min(candidates, len(scores) - (self._position[code] >= 0))
+        if count <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, count - 1)[:count]
+        return self.indexed[top]
+
+    def similar_items(self, key, candidates=None):
+        """🔎 近似的相似电影：DataFrame(correlation, support)，候选集上的相关系数是精确值"""
+        code = self.items.get_loc(key)
+        codes = self.candidates(code, candidates)
+        if len(codes) == 0:
+            return pd.DataFrame({'correlation': [], 'support': []}, index=self.items[:0])
+        corr, support = self.similarity.pearson_subset(code, codes)
+        return pd.DataFrame(
+            {'correlation': corr, 'support': support}, index=self.items[codes]
+        ).dropna()
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def measure_recall(ann, codes, k=10, candidates=(25, 50, 100, 200)):
+    """📏 以精确计算为基准，测量不同候选数下的 recall@k 与平均延迟
+
+    基准为所有已索引电影中相关系数最高的 k 部。返回每个候选数一行的 DataFrame。
+    """
+    similarity = ann.similarity
+    eligible = np.zeros(similarity.n_items, dtype=bool)
+    eligible[ann.indexed] = True
+
+    truths, exact_time = [], 0.0
+    for code in codes:
+        started = time.perf_counter()
+        corr, _ = similarity.pearson(code)
+        exact_time += time.perf_counter() - started
+        corr = corr[0]
+        corr[~eligible] = np.nan
+        corr[code] = np.nan
+        valid = np.flatnonzero(~np.isnan(corr))
+        truths.append(set(valid[np.argsort(-corr[valid], kind='stable')[:k]]))
+
+    rows = []
+    for n_candidates in candidates:
+        hits = total = 0
+        ann_time = 0.0
+        for code, truth in zip(codes, truths):
+            started = time.perf_counter()
+            result = ann.similar_items(ann.items[code], n_candidates)
+            ann_time += time.perf_counter() - started
+            found = set(ann.items.get_indexer(result.nlargest(k, 'correlation').index))
+            hits += len(found & truth)
+            total += len(truth)
+        rows.append({
+            'candidates': n_candidates,
+            f'recall@{k}': hits / max(total, 1),
+            'ann_ms': ann_time * 1000 / max(len(codes), 1),
+            'exact_ms': exact_time * 1000 / max(len(codes), 1),
+        })
+    return pd.DataFrame(rows).set_index('candidates')
@@ -0,0 +1,190 @@
+"""🏭 批量预计算 - 为全部电影 / 全部用户生成推荐列表
+
+目录按固定大小切成分片，由进程池并行计算，每完成一个分片就写出一个结果文件
+（``part-00012.jsonl`` 或 ``.parquet``，先写临时文件再原子替换）。输出目录中的
+``_manifest.json`` 记录参数与数据指纹，中断后以相同参数重跑会跳过已写出的分片。
+
+- ``movies``：每部电影的相似电影，语义同 :func:`~recommender.engine.get_movie_recommendations`
+  （``min_ratings``、相关度阈值、top-N）
+- ``users``：每位用户的推荐，语义同 :meth:`~recommender.engine.Engine.recommend_for_user`
+  （基于物品、相似用户或矩阵分解）
+"""
+import glob
+import json
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+from recommender.data import DATA_DIR
+from recommender.engine import Engine
+
+KINDS = ('movies', 'users')
+FORMATS = ('jsonl', 'parquet')
+MANIFEST = '_manifest.json'
+
+# 工作进程内的推荐引擎，由 _init_worker 加载一次
+_engine = None
+
+
+def check_format(fmt):
+    """📄 检查输出格式可用：Parquet 需要可选依赖 pyarrow"""
+    if fmt not in FORMATS:
+        raise ValueError(f"未知的输出格式: {fmt}")
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError("写出 Parquet 需要 pyarrow：pip install pyarrow，或改用 --format jsonl") from None
+
+
+def part_path(output, shard_id, fmt):
+    return os.path.join(output, f'part-{shard_id:05d}.{fmt}')
+
+
+def shards(keys, shard_size):
+    """✂️ 按顺序切分，分片编号只由键列表与分片大小决定，重跑时保持一致"""
+    return [(shard_id, keys[start:start + shard_size])
+            for shard_id, start in enumerate(range(0, len(keys), shard_size))]
+
+
+def _init_worker(data_dir, kind, method, min_ratings, engine=None, user_method='item'):
+    global _engine
+    _engine = engine or Engine.load(data_dir)
+    # 先建好本任务用到的索引，分片计时只包含推荐本身
+    if kind == 'users' and user_method == 'user':
+        _engine.user_knn
+    elif kind == 'users' and user_method == 'als':
+        _engine.als
+    elif kind == 'users' or method == 'pearson':
+        _engine.similarity
+    elif method == 'auto':
+        _engine.pick_method(min_ratings)
+
+
+def _run_shard(task):
+    """⚙️ 计算一个分片，返回 (分片编号, 长表结果, 条目数, 用时秒数, 进程号)"""
+    shard_id, kind, keys, params = task
+    started = time.perf_counter()
+    frames = [compute(_engine, kind, key, **params) for key in keys]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return shard_id, frame, len(keys), time.perf_counter() - started, os.getpid()
+
+
+def compute(engine, kind, key, min_ratings=100, threshold=0.0, top_n=10, method='auto', user_method='item'):
+    """📋 一部电影或一位用户的结果，长表形式：每条推荐一行，rank 从 1 开始"""
+    if kind == 'movies':
+        similar = engine.recommend(key, min_ratings, method=method)
+        similar = similar[similar['correlation'] >= threshold].head(top_n)
+        return pd.DataFrame({
+            'movieId': key,
+            'rank': range(1, len(similar) + 1),
+            'similarMovieId': similar.index.to_numpy(),
+            'correlation': similar['correlation'].to_numpy(),
+            'support': similar['support'].to_numpy(),
+        })
+    recommended = engine.recommend_for_user(key, min_ratings, method=user_method).head(top_n)
+    # 预测评分（或隐式模型的得分）与支持数，各方法提供的列不完全相同
+    scored = recommended.drop(columns=['ratings_count', 'avg_rating'])
+    return pd.DataFrame({
+        'userId': key,
+        'rank': range(1, len(recommended) + 1),
+        'movieId': recommended.index.to_numpy(),
+        **{column: scored[column].to_numpy() for column in scored.columns},
+    })
+
+
+def write_part(path, kind, keys, frame, fmt):
+    """💾 写出一个分片：先写临时文件再原子替换，中断时不会留下半个分片"""
+    tmp_path = f'{path}.tmp'
+    if fmt == 'parquet':
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        source = 'movieId' if kind == 'movies' else 'userId'
+        field = 'similar' if kind == 'movies' else 'recommendations'
+        groups = dict(tuple(frame.groupby(source, sort=False))) if len(frame) else {}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key in keys:
+                rows = groups.get(key, frame.iloc[:0]).drop(columns=[source, 'rank'])
+                f.write(json.dumps({source: int(key), field: rows.to_dict('records')}) + '\n')
+    os.replace(tmp_path, path)
+
+
+def prepare_output(output, manifest, resume):
+    """📁 准备输出目录：参数与已有结果一致时返回已完成的分片编号，否则清空旧分片"""
+    os.makedirs(output, exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST)
+    if resume and os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            previous = json.load(f)
+        if previous == manifest:
+            done = glob.glob(os.path.join(output, f"part-*.{manifest['format']}"))
+            return {int(os.path.basename(path)[5:10]) for path in done}
+
+    for path in glob.glob(os.path.join(output, 'part-*')):
+        os.remove(path)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return set()
+
+
+def run_batch(kind, output, data_dir=DATA_DIR, workers=None, shard_size=200, fmt='jsonl', resume=True,
+              min_ratings=100, threshold=0.0, top_n=10, method='auto', user_method='item', log=print):
+    """🏭 为全部电影或全部用户预计算推荐，返回吞吐量报告
+
+    ``workers`` 默认为 CPU 核数，为 1 时在当前进程内计算。报告包含总条目数、跳过的分片数、
+    总用时与每个工作进程的条目数 / 计算用时 / 每秒条目数。
+    """
+    if kind not in KINDS:
+        raise ValueError(f"未知的批处理类型: {kind}")
+    check_format(fmt)
+    workers = workers or os.cpu_count() or 1
+    params = {'min_ratings': min_ratings, 'threshold': threshold, 'top_n': top_n, 'method': method,
+              'user_method': user_method}
+
+    engine = Engine.load(data_dir)
+    keys = (engine.data.movies.index if kind == 'movies' else engine.data.users.user_ids).tolist()
+    manifest = dict(params, kind=kind, format=fmt, shard_size=shard_size, fingerprint=engine.fingerprint)
+    done = prepare_output(output, manifest, resume)
+    tasks = [(shard_id, kind, shard_keys, params)
+             for shard_id, shard_keys in shards(keys, shard_size) if shard_id not in done]
+    if done:
+        log(f"↩️ 跳过已完成的 {len(done)} 个分片")
+
+    per_worker = defaultdict(lambda: {'items': 0, 'seconds': 0.0})
+    started = time.perf_counter()
+    if workers == 1:
+        _init_worker(data_dir, kind, method, min_ratings, engine, user_method)
+        results = map(_run_shard, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                    initargs=(data_dir, kind, method, min_ratings, None, user_method))
+        results = pool.imap_unordered(_run_shard, tasks)
+    try:
+        keys_of = {task[0]: task[2] for task in tasks}
+        for finished, (shard_id, frame, n_items, seconds, pid) in enumerate(results, 1):
+            write_part(part_path(output, shard_id, fmt), kind, keys_of[shard_id], frame, fmt)
+            per_worker[pid]['items'] += n_items
+            per_worker[pid]['seconds'] += seconds
+            log(f"📦 分片 {shard_id}：{n_items} 条，{seconds:.1f}s（{finished}/{len(tasks)}）")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    elapsed = time.perf_counter() - started
+    items = sum(stats['items'] for stats in per_worker.values())
+    return {
+        'kind': kind,
+        'items': items,
+        'skipped_shards': len(done),
+        'seconds': elapsed,
+        'items_per_second': items / elapsed if elapsed > 0 else 0.0,
+        'workers': {
+            pid: dict(stats, items_per_second=stats['items'] / stats['seconds'] if stats['seconds'] else 0.0)
+            for pid, stats in per_worker.items()
+        },
+    }
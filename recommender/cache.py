@@ -0,0 +1,117 @@
+"""🗃️ 按字节数限定容量的 LRU / TTL 结果缓存
+
+相似电影的完整排序结果只取决于 (电影, 最小评分数, 计算方法, 数据版本)，相关度阈值与推荐数量
+都是之后对结果的切片，因此缓存完整列表即可服务所有滑块组合。缓存线程安全，供同一进程内的
+所有会话 / 请求共享；取出的结果是共享对象，调用方只能读取或切片，不能原地修改。
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 默认容量：64 MB
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def sizeof(value):
+    """📏 估计缓存值占用的字节数"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """🗃️ LRU 结果缓存：总字节数超过 ``max_bytes`` 时淘汰最久未用的条目，``ttl`` 秒后条目过期
+
+    ``ttl`` 为 None 时不过期（键中已含数据版本，数据变化后旧条目自然不再命中并被逐步淘汰）。
+    单个超过容量的结果不缓存。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=None, clock=time.monotonic):
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self.clock = clock
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # 键 → (值, 字节数, 写入时间)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self.clock() - entry[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=None):
+        nbytes = sizeof(value) if nbytes is None else int(nbytes)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes, self.clock())
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """命中时直接返回，否则调用 ``compute()`` 并写入缓存；返回 (值, 是否命中)"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        value = compute()
+        self.put(key, value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        """📊 命中 / 未命中 / 淘汰 / 过期次数、命中率、条目数与占用字节数"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hit_rate,
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_MISSING = object()
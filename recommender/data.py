@@ -0,0 +1,311 @@
+"""📦 数据文件读取与快照缓存"""
+import copy
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from recommender import snapshot
+from recommender.cache import sizeof
+from recommender.genres import GenreIndex
+from recommender.matrix import RatingMatrix
+from recommender.memory import MEMORY_BUDGET, MemoryPlan, plan_memory
+from recommender.search import split_year
+from recommender.timing import timed
+from recommender.users import UserIndex
+
+DATA_DIR = 'data'
+CACHE_DIR = os.path.join(DATA_DIR, 'cache')
+
+# 贝叶斯平均分的先验强度：相当于每部电影额外获得这么多条全局平均分的评分
+PRIOR_RATINGS = 50
+
+
+class MovieInfo(NamedTuple):
+    """🎬 渲染一部电影所需的元数据"""
+    movie_id: int
+    title: str
+    label: str
+    genres: str
+    year: int | None
+    ratings_count: int
+    avg_rating: float
+    first_rated: pd.Timestamp
+    last_rated: pd.Timestamp
+
+
+@dataclass
+class MovieData:
+    """🎬 推荐所需的全部数据结构，电影与用户都以整数 ID 为键
+
+    - ``ratings``：评分明细（userId/movieId 为 int32，rating 为 float32，timestamp 为 uint32），
+      低内存方案下为 None
+    - ``movies``：以 movieId 为索引的电影统计表，只含有评分的电影，是唯一的标题字典：
+      title、genres、year（无年份为 0）、ratings_count、avg_rating、rating_var（样本方差）、
+      bayes_rating（向全局平均分收缩的贝叶斯平均分）、first_rated / last_rated
+    - ``movie_matrix``：列键为 movieId 的稀疏评分矩阵
+    - ``genre_index``：与 ``movies`` 行对齐的类型位掩码与倒排表
+    - ``users``：按用户切片评分矩阵的索引与每位用户的评分数、平均分、类型直方图
+
+    ``metadata`` 在构造时由 ``movies`` 生成，movieId → :class:`MovieInfo`，渲染时 O(1) 取用；
+    ``by_title`` 为标题 → movieId 元组（同名电影有多个）。``plan`` 为加载时选定的内存方案
+    （:class:`~recommender.memory.MemoryPlan`），未给出时为不限预算的完整方案。
+    """
+    ratings: pd.DataFrame | None
+    movies: pd.DataFrame
+    movie_matrix: RatingMatrix
+    genre_index: GenreIndex
+    users: UserIndex
+    plan: MemoryPlan | None = None
+    metadata: dict = field(init=False, repr=False)
+    by_title: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.plan is None:
+            matrix = self.movie_matrix
+            self.plan = plan_memory(matrix.nnz, matrix.n_users, matrix.n_items)
+        movies = self.movies
+        titles = movies['title'].tolist()
+        shared = movies['title'].duplicated(keep=False).to_numpy()
+        self.metadata = {}
+        self.by_title = {}
+        columns = zip(movies.index.tolist(), titles, shared, movies['genres'].astype(str).tolist(),
+                      movies['year'].tolist(), movies['ratings_count'].tolist(),
+                      movies['avg_rating'].round(2).tolist(), movies['first_rated'], movies['last_rated'])
+        for movie_id, title, is_shared, genres, year, count, mean, first, last in columns:
+            label = f"{title} [#{movie_id}]" if is_shared else title
+            self.metadata[movie_id] = MovieInfo(movie_id, title, label, genres, year or None,
+                                                count, mean, first, last)
+            self.by_title[title] = self.by_title.get(title, ()) + (movie_id,)
+
+    @property
+    def n_ratings(self):
+        return self.movie_matrix.nnz if self.ratings is None else len(self.ratings)
+
+    @property
+    def mean_rating(self):
+        """⭐ 全部评分的平均分"""
+        return float(np.average(self.movies['avg_rating'], weights=self.movies['ratings_count']))
+
+    def updated(self, ratings, movies, movie_matrix, users, changed):
+        """🔁 新数据版本（不修改当前对象）：电影集合不变，类型索引与标题字典沿用，
+        只重建 ``changed``（movieId 列表）这些电影的元数据"""
+        data = copy.copy(self)
+        data.ratings, data.movies, data.movie_matrix, data.users = ratings, movies, movie_matrix, users
+        data.metadata = dict(self.metadata)
+        rows = movies.loc[changed]
+        columns = zip(changed, rows['ratings_count'].tolist(), rows['avg_rating'].round(2).tolist(),
+                      rows['first_rated'], rows['last_rated'])
+        for movie_id, count, mean, first, last in columns:
+            data.metadata[movie_id] = self.metadata[movie_id]._replace(
+                ratings_count=count, avg_rating=mean, first_rated=first, last_rated=last)
+        return data
+
+    def rating_counts(self):
+        """📊 各评分值（0.5–5.0）的评分条数；未保留评分明细时由评分矩阵统计"""
+        if self.ratings is not None:
+            return self.ratings['rating'].value_counts().sort_index()
+        values, counts = np.unique(self.movie_matrix.csr.data, return_counts=True)
+        return pd.Series(counts, index=pd.Index(values, name='rating'), name='count')
+
+    def memory_usage(self):
+        """💾 各数据结构占用的字节数（元数据与标题字典按 Python 对象估计）"""
+        usage = {} if self.ratings is None else {'ratings': sizeof(self.ratings)}
+        metadata = sys.getsizeof(self.metadata) + sys.getsizeof(self.by_title)
+        metadata += sum(sys.getsizeof(info) + sum(map(sys.getsizeof, info)) for info in self.metadata.values())
+        metadata += sum(sys.getsizeof(ids) for ids in self.by_title.values())
+        usage.update(movies=sizeof(self.movies), metadata=metadata, movie_matrix=self.movie_matrix.nbytes,
+                     genre_index=self.genre_index.nbytes, users=self.users.nbytes)
+        return usage
+
+    def info(self, movie_id):
+        """🎬 movieId → :class:`MovieInfo`，不存在时抛出 KeyError"""
+        return self.metadata[movie_id]
+
+    def label(self, movie_id):
+        """🏷️ movieId → 显示名称；同名的不同电影附加 movieId 以便区分"""
+        return self.metadata[movie_id].label
+
+
+def data_sources(data_dir=DATA_DIR):
+    """📄 快照依赖的源文件"""
+    return {
+        'ratings': os.path.join(data_dir, 'ratings.csv'),
+        'movies': os.path.join(data_dir, 'movies.csv'),
+    }
+
+
+def snapshot_dir(data_dir=DATA_DIR):
+    return os.path.join(data_dir, 'cache', 'snapshot')
+
+
+def load_tables(data_dir=DATA_DIR, use_snapshot=True):
+    """📦 读取评分数据的所有列
+
+    快照有效时以内存映射方式加载；否则解析 CSV、构建派生结构并写入快照（写入失败，
+    例如只读部署时，不影响本次加载）。
+    """
+    sources = data_sources(data_dir)
+    directory = snapshot_dir(data_dir)
+    if use_snapshot:
+        cached = snapshot.load(directory, sources)
+        if cached is not None:
+            columns, meta = cached
+            return dict(columns, fingerprint=meta['fingerprint'])
+
+    tables = parse_tables(sources)
+    if use_snapshot:
+        columns = {name: value for name, value in tables.items() if name != 'fingerprint'}
+        try:
+            snapshot.save(directory, columns, sources, meta={'fingerprint': tables['fingerprint']})
+        except OSError:
+            pass
+    return tables
+
+
+def parse_tables(sources):
+    """🐢 解析 CSV：只保留电影表中存在的评分，电影级的列按 movieId 升序对齐矩阵的列
+
+    评分明细按行保存 (user_id, movie_id, rating, timestamp)；电影级保存 movie_ids、titles、
+    genre_code（指向去重的 genres 表）以及 :func:`movie_stats` 的各列。
+    """
+    ratings = pd.read_csv(sources['ratings'], dtype={
+        'userId': np.int32, 'movieId': np.int32, 'rating': np.float32, 'timestamp': np.int64,
+    })
+    movies = pd.read_csv(sources['movies'], dtype={'movieId': np.int32})
+    movies = movies.sort_values('movieId', kind='stable').drop_duplicates('movieId')
+
+    known_ids = movies['movieId'].to_numpy()
+    rating_movies = ratings['movieId'].to_numpy()
+    position = np.minimum(np.searchsorted(known_ids, rating_movies), len(known_ids) - 1)
+    ratings = ratings[known_ids[position] == rating_movies]
+
+    user_id = ratings['userId'].to_numpy()
+    movie_id = ratings['movieId'].to_numpy()
+    rating = ratings['rating'].to_numpy()
+    movie_matrix = RatingMatrix.from_ratings(user_id, movie_id, rating)
+
+    movie_ids = movie_matrix.items.to_numpy()
+    movies = movies.set_index('movieId').loc[movie_ids]
+    genres, genre_code = np.unique(movies['genres'].fillna('').to_numpy().astype(str), return_inverse=True)
+    timestamp = ratings['timestamp'].to_numpy().astype(np.uint32)
+    stats = movie_stats(movie_matrix.items.get_indexer(movie_id), rating, timestamp, len(movie_ids))
+
+    return dict(
+        movie_matrix.to_arrays(),
+        user_id=user_id,
+        movie_id=movie_id,
+        rating=rating,
+        timestamp=timestamp,
+        movie_ids=movie_ids,
+        titles=movies['title'].astype(str).tolist(),
+        year=np.array([split_year(title)[1] or 0 for title in movies['title'].astype(str)], dtype=np.int16),
+        genre_code=genre_code.astype(np.int32),
+        genres=genres.tolist(),
+        **stats,
+        fingerprint=movie_matrix.fingerprint,
+    )
+
+
+def movie_stats(code, rating, timestamp, n_movies, prior_ratings=PRIOR_RATINGS):
+    """📊 一次遍历评分明细得到每部电影的统计量，``code`` 为评分对应的电影编码
+
+    贝叶斯平均分 = (先验强度 × 全局平均分 + 评分总和) / (先验强度 + 评分数)，
+    评分很少的电影会被拉向全局平均分。
+    """
+    rating = rating.astype(np.float64)
+    counts = np.bincount(code, minlength=n_movies)
+    sums = np.bincount(code, weights=rating, minlength=n_movies)
+    squares = np.bincount(code, weights=rating * rating, minlength=n_movies)
+    means = sums / np.maximum(counts, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variances = np.where(counts > 1, np.maximum(squares - sums * means, 0) / (counts - 1), np.nan)
+    prior = sums.sum() / max(counts.sum(), 1)
+
+    first = np.full(n_movies, np.iinfo(np.uint32).max, dtype=np.uint32)
+    last = np.zeros(n_movies, dtype=np.uint32)
+    np.minimum.at(first, code, timestamp)
+    np.maximum.at(last, code, timestamp)
+    return {
+        'ratings_count': counts.astype(np.int32),
+        'avg_rating': means,
+        'rating_var': variances,
+        'bayes_rating': (prior_ratings * prior + sums) / (prior_ratings + counts),
+        'first_rated': first,
+        'last_rated': last,
+    }
+
+
+def update_movie_stats(movies, code, rating, timestamp, prior_ratings=PRIOR_RATINGS):
+    """📊 在电影统计表上累加新评分（``code`` 为电影编码），返回新表，结果与 :func:`movie_stats` 一致
+
+    评分总和与平方和由平均分、样本方差还原；全局平均分随之变化，所有电影的贝叶斯平均分都要重算。
+    """
+    counts = movies['ratings_count'].to_numpy().astype(np.int64)
+    means = movies['avg_rating'].to_numpy()
+    sums = means * counts
+    squares = np.where(counts > 1, movies['rating_var'].to_numpy() * (counts - 1), 0.0) + sums * means
+
+    rating = rating.astype(np.float64)
+    counts = counts + np.bincount(code, minlength=len(movies))
+    sums = sums + np.bincount(code, weights=rating, minlength=len(movies))
+    squares = squares + np.bincount(code, weights=rating * rating, minlength=len(movies))
+    means = sums / np.maximum(counts, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variances = np.where(counts > 1, np.maximum(squares - sums * means, 0) / (counts - 1), np.nan)
+    prior = sums.sum() / max(counts.sum(), 1)
+
+    first = _seconds(movies['first_rated'])
+    last = _seconds(movies['last_rated'])
+    np.minimum.at(first, code, timestamp.astype(np.int64))
+    np.maximum.at(last, code, timestamp.astype(np.int64))
+    return movies.assign(
+        ratings_count=counts.astype(np.int32),
+        avg_rating=means,
+        rating_var=variances,
+        bayes_rating=(prior_ratings * prior + sums) / (prior_ratings + counts),
+        first_rated=pd.to_datetime(first, unit='s'),
+        last_rated=pd.to_datetime(last, unit='s'),
+    )
+
+
+def _seconds(column):
+    return column.to_numpy().astype('datetime64[s]').astype(np.int64)
+
+
+@timed()
+def load_movie_data(data_dir=DATA_DIR, use_snapshot=True, budget=MEMORY_BUDGET):
+    """📦 加载推荐所需的全部结构，返回 :class:`MovieData`
+
+    ``budget``（字节，默认取自 ``RECOMMENDER_MEMORY_BUDGET``）不为 None 时按数据规模选择
+    能放进预算的表示（见 :func:`~recommender.memory.plan_memory`），记在返回值的 ``plan`` 上。
+    """
+    tables = load_tables(data_dir, use_snapshot)
+    movie_ids = pd.Index(np.asarray(tables['movie_ids']), name='movieId')
+    plan = plan_memory(len(tables['rating']), len(tables['user_ids']), len(movie_ids), budget)
+
+    movie_matrix = RatingMatrix.from_arrays(tables, movie_ids, tables['fingerprint'])
+    ratings = None
+    if plan.keep_ratings:
+        ratings = pd.DataFrame({
+            'userId': tables['user_id'],
+            'movieId': tables['movie_id'],
+            'rating': tables['rating'],
+            'timestamp': tables['timestamp'],
+        }, copy=False)
+    movies = pd.DataFrame({
+        'title': tables['titles'],
+        'genres': pd.Categorical.from_codes(tables['genre_code'], categories=tables['genres']),
+        'year': tables['year'],
+        'ratings_count': tables['ratings_count'],
+        'avg_rating': tables['avg_rating'],
+        'rating_var': tables['rating_var'],
+        'bayes_rating': tables['bayes_rating'],
+        'first_rated': pd.to_datetime(np.asarray(tables['first_rated'], dtype=np.int64), unit='s'),
+        'last_rated': pd.to_datetime(np.asarray(tables['last_rated'], dtype=np.int64), unit='s'),
+    }, index=movie_ids)
+    genre_index = GenreIndex(movie_ids, movies['genres'])
+    return MovieData(ratings, movies, movie_matrix, genre_index, UserIndex(movie_matrix, genre_index), plan)
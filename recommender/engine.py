@@ -0,0 +1,529 @@
+"""🎬 推荐引擎 - 不依赖 Streamlit 的 Python 接口
+
+数据加载、索引构建以及推荐、搜索、类型排行、用户画像等函数都在这里，批处理任务和 API
+进程直接导入本模块即可，不会引入 Streamlit / Plotly。``app.py`` 只是它之上的界面。
+
+    from recommender.engine import Engine
+    engine = Engine.load()
+    engine.recommend(1, min_ratings=100).head(10)
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from recommender.als import ALSModel, top_n
+from recommender.ann import ANN_MIN_ITEMS, RandomProjectionIndex
+from recommender.data import DATA_DIR, load_movie_data
+from recommender.memory import MEMORY_BUDGET
+from recommender.neighbors import NeighborIndex
+from recommender.progress import Progress
+from recommender.search import TitleIndex
+from recommender.similarity import PearsonSimilarity, corrwith_reference
+from recommender.timing import span, timed
+from recommender.user_knn import MIN_SUPPORT, UserKNN
+
+# 标题搜索最多返回的结果数
+SEARCH_LIMIT = 100
+# 引擎按需构建 / 读取的全部索引
+INDEXES = ('neighbor_index', 'similarity', 'title_index', 'ann_index', 'user_knn', 'als')
+
+
+@timed()
+def get_movie_recommendations(movie_id, movie_matrix, movies, min_ratings=100,
+                              neighbor_index=None, similarity=None, ann_index=None, method='auto',
+                              progress=None):
+    """🎯 基于协同过滤的电影推荐算法，电影不存在时抛出 KeyError
+
+    method: 'index' 查近邻索引 / 'ann' 近似近邻 / 'pearson' 向量化精确计算 /
+    'corrwith' pandas 逐列计算（用于核对结果）/ 'auto' 依次选用可用的索引、近似近邻、精确计算
+
+    progress: 可选回调 (阶段, 完成比例, 耗时秒数)，依次报告 load / similarity / filter / rank
+    """
+    phases = Progress(progress)
+    if method == 'auto':
+        if neighbor_index is not None and neighbor_index.covers(min_ratings):
+            method = 'index'
+        elif ann_index is not None and ann_index.covers(min_ratings):
+            method = 'ann'
+        else:
+            method = 'pearson'
+    phases.done('load')
+    if method == 'index':
+        corr_df = neighbor_index.lookup(movie_id)
+    elif method == 'ann':
+        corr_df = ann_index.similar_items(movie_id)
+    elif method == 'pearson':
+        corr_df = (similarity or PearsonSimilarity(movie_matrix)).similar_items(movie_id)
+    elif method == 'corrwith':
+        corr_df = corrwith_reference(movie_matrix, movie_id)
+    else:
+        raise ValueError(f"未知的推荐方法: {method}")
+    phases.done('similarity')
+    filtered_corr_df = filter_similar(corr_df, movies, movie_id, min_ratings)
+    phases.done('filter')
+    result = filtered_corr_df.sort_values(by='correlation', ascending=False)
+    phases.done('rank')
+    return result
+
+
+def filter_similar(corr_df, movies, movie_id, min_ratings):
+    """🎯 补上评分数与平均分，去掉评分数不足的电影和查询电影自身"""
+    corr_df = corr_df.join(movies[['ratings_count', 'avg_rating']], how='left')
+    filtered_corr_df = corr_df[corr_df['ratings_count'] >= min_ratings]
+    return filtered_corr_df[filtered_corr_df.index != movie_id]
+
+
+@timed()
+def get_seed_recommendations(seeds, movies, similarity, min_ratings=100, progress=None):
+    """🎞️ 与一组种子电影相似的电影，种子不存在时抛出 KeyError
+
+    ``seeds`` 为 movieId → 权重（喜欢的为正，不喜欢的为负）。所有种子与候选电影的相关系数在一次
+    批量矩阵乘积中算出并加权汇总：score = Σ wᵢ·ρᵢⱼ / Σ |wᵢ|，无定义的相关系数按 0 计。候选只限
+    评分数不少于 ``min_ratings`` 且不是种子的电影。返回 DataFrame(score, support, ratings_count,
+    avg_rating)，按 score 降序，support 为与该电影的相关系数有定义的种子数。
+
+    progress: 可选回调 (阶段, 完成比例, 耗时秒数)，依次报告 load / similarity / filter / rank
+    """
+    phases = Progress(progress)
+    seed_ids = list(seeds)
+    codes = similarity.items.get_indexer(seed_ids)
+    if (codes < 0).any():
+        raise KeyError(seed_ids[int(np.argmax(codes < 0))])
+    weights = np.array([seeds[movie_id] for movie_id in seed_ids], dtype=np.float64)
+    seen = movies.index.isin(seed_ids)
+    columns = np.flatnonzero((movies['ratings_count'].to_numpy() >= min_ratings) & ~seen)
+    phases.done('load')
+    weighted, _, support = similarity.aggregate(codes, weights, columns)
+    phases.done('similarity')
+    keep = support > 0
+    scored = movies.iloc[columns[keep]][['ratings_count', 'avg_rating']]
+    scored.insert(0, 'score', weighted[keep] / np.abs(weights).sum())
+    scored.insert(1, 'support', support[keep])
+    phases.done('filter')
+    result = scored.sort_values('score', ascending=False, kind='stable')
+    phases.done('rank')
+    return result
+
+
+@timed()
+def get_movie_rating_stats(movies, min_ratings=0):
+    """📊 每部电影的评分统计 (avg_rating, rating_count, bayes_rating)，直接取自加载时预计算的电影统计表"""
+    stats = movies[['avg_rating', 'ratings_count', 'bayes_rating']].round(2)
+    stats.columns = ['avg_rating', 'rating_count', 'bayes_rating']
+    return stats[stats['rating_count'] >= min_ratings]
+
+
+@timed()
+def get_top_movies_by_genre(movies, genre_index, genre, min_ratings=50):
+    """🏆 按电影类型筛选热门电影"""
+    genre_movies = movies[genre_index.select([genre])]
+    genre_stats = get_movie_rating_stats(genre_movies, min_ratings)
+    return genre_stats.sort_values('avg_rating', ascending=False)
+
+
+@timed()
+def search_movies(title_index, search_term, limit=SEARCH_LIMIT):
+    """🔍 模糊搜索电影功能 - 按 完全相同 > 前缀 > 子串 > 拼写近似 排序的 movieId"""
+    return title_index.search(search_term, limit).tolist()
+
+
+@timed()
+def get_user_rating_stats(users, user_id):
+    """👤 用户观影行为分析 - 读取加载时预计算的用户画像"""
+    return users.profile(user_id)
+
+
+@timed()
+def get_user_recommendations(user_id, users, movies, similarity, min_ratings=100, progress=None):
+    """👤 为用户推荐没看过的电影（基于物品的协同过滤），用户不存在时抛出 KeyError
+
+    预测评分 = 用户平均分 + Σ ρ·(r - 用户平均分) / Σ |ρ|，求和遍历该用户评过的电影；
+    候选只限评分数不少于 ``min_ratings`` 的电影。返回 DataFrame(predicted_rating, support,
+    ratings_count, avg_rating)，按预测评分降序，support 为参与预测的已评电影数。
+
+    progress: 可选回调 (阶段, 完成比例, 耗时秒数)，依次报告 load / similarity / filter / rank
+    """
+    phases = Progress(progress)
+    rated = users.ratings(user_id)
+    user_mean = float(rated['rating'].mean())
+    seen = movies.index.isin(rated['movieId'])
+    columns = np.flatnonzero((movies['ratings_count'].to_numpy() >= min_ratings) & ~seen)
+    phases.done('load')
+    weighted, norm, support = similarity.aggregate(
+        similarity.items.get_indexer(rated['movieId']), rated['rating'].to_numpy() - user_mean, columns
+    )
+    phases.done('similarity')
+    keep = norm > 0
+    predicted = movies.iloc[columns[keep]][['ratings_count', 'avg_rating']]
+    predicted.insert(0, 'predicted_rating', np.clip(user_mean + weighted[keep] / norm[keep], 0.5, 5.0))
+    predicted.insert(1, 'support', support[keep])
+    phases.done('filter')
+    result = predicted.sort_values('predicted_rating', ascending=False, kind='stable')
+    phases.done('rank')
+    return result
+
+
+@timed()
+def get_user_knn_recommendations(user_id, movie_matrix, movies, user_knn, min_ratings=100, k=50,
+                                 min_support=MIN_SUPPORT, progress=None):
+    """👥 为用户推荐没看过的电影（基于用户的协同过滤），用户不存在时抛出 KeyError
+
+    找出中心化评分最相似的 ``k`` 位用户，按相似度加权汇总他们的评分得到预测评分；
+    候选只限评分数不少于 ``min_ratings``、且至少 ``min_support`` 位邻居评过的电影。
+    返回列与 :func:`get_user_recommendations` 相同，support 为评过该电影的邻居数。
+
+    progress: 可选回调 (阶段, 完成比例, 耗时秒数)，依次报告 load / similarity / filter / rank
+    """
+    phases = Progress(progress)
+    code = movie_matrix.user_code(user_id)
+    phases.done('load')
+    predicted, support, seen = user_knn.predict(code, k, min_support)
+    phases.done('similarity')
+    keep = ~np.isnan(predicted) & ~seen & (movies['ratings_count'].to_numpy() >= min_ratings)
+    result = movies.loc[keep, ['ratings_count', 'avg_rating']]
+    result.insert(0, 'predicted_rating', predicted[keep])
+    result.insert(1, 'support', support[keep])
+    phases.done('filter')
+    # 预测评分截断在 5 分时常有并列，并列的按参与预测的邻居数排序
+    result = result.sort_values(['predicted_rating', 'support'], ascending=False, kind='stable')
+    phases.done('rank')
+    return result
+
+
+@timed()
+def get_als_recommendations(user_id, movie_matrix, movies, als, min_ratings=100, n=None, progress=None):
+    """🧮 用矩阵分解因子为用户推荐没看过的电影：一次稠密点积加 argpartition，用户不存在时抛出 KeyError
+
+    显式模型返回 predicted_rating（预测评分），隐式模型返回 score（偏好得分）；另附 ratings_count、
+    avg_rating。``n`` 为 None 时返回全部候选。
+
+    progress: 可选回调 (阶段, 完成比例, 耗时秒数)，依次报告 load / similarity / filter / rank
+    """
+    phases = Progress(progress)
+    code = movie_matrix.user_code(user_id)
+    csr = movie_matrix.csr
+    seen = csr.indices[csr.indptr[code]:csr.indptr[code + 1]]
+    candidates = movies['ratings_count'].to_numpy() >= min_ratings
+    phases.done('load')
+    scores = als.scores(code)
+    phases.done('similarity')
+    scores = np.where(candidates, scores, -np.inf)
+    scores[seen] = -np.inf
+    phases.done('filter')
+    codes, top = top_n(scores, len(scores) if n is None else n)
+    result = movies.iloc[codes][['ratings_count', 'avg_rating']]
+    if als.implicit:
+        result.insert(0, 'score', top)
+    else:
+        result.insert(0, 'predicted_rating', np.clip(top, 0.5, 5.0))
+    phases.done('rank')
+    return result
+
+
+@timed()
+def get_random_recommendations(movies, count=5, min_rating=4.0, min_ratings=50, progress=None, seed=None):
+    """🎲 随机推荐高分电影
+
+    progress: 可选回调 (阶段, 完成比例, 耗时秒数)，依次报告 load / filter / rank
+    """
+    phases = Progress(progress, phases=('load', 'filter', 'rank'))
+    high_rated = get_movie_rating_stats(movies, min_ratings)
+    phases.done('load')
+    high_rated = high_rated[high_rated['avg_rating'] >= min_rating]
+    phases.done('filter')
+    picked = high_rated.sample(min(count, len(high_rated)), random_state=seed)
+    phases.done('rank')
+    return picked
+
+
+def predict_rating(user_avg, movie_avg, genre_factor=1.0):
+    """🔮 简单的评分预测"""
+    base_prediction = (user_avg + movie_avg) / 2
+    return min(5.0, max(1.0, base_prediction * genre_factor))
+
+
+class Engine:
+    """🎬 数据与各索引的组合，提供推荐引擎的全部查询
+
+    索引可以在构造时传入（例如界面层跨会话缓存的实例），未传入的在第一次用到时构建：
+    只做类型排行或用户画像的进程不必付出相似度引擎与搜索索引的构建成本。
+    第一次构建在锁内进行，同时用到的线程只构建一次；``on_build`` 在每个新建的索引发布前调用
+    （跨会话共享的引擎用它把索引设为只读，见 :func:`recommender.shared.freeze`）。
+
+    传入 ``cache``（:class:`~recommender.cache.ResultCache`）时，相似电影的完整排序结果按
+    (电影, 最小评分数, 方法, 数据指纹) 缓存，返回的 DataFrame 是共享对象，只能读取或切片。
+    """
+
+    def __init__(self, data, neighbor_index=None, similarity=None, title_index=None, ann_index=None,
+                 ann_min_items=ANN_MIN_ITEMS, cache=None, on_build=None):
+        self.data = data
+        self.ann_min_items = ann_min_items
+        self.cache = cache
+        self.on_build = on_build
+        self._neighbor_index = neighbor_index
+        self._similarity = similarity
+        self._title_index = title_index
+        self._ann_index = ann_index
+        self._user_knn = None
+        self._als = None
+        self._lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _lock=threading.RLock())
+
+    @classmethod
+    def load(cls, data_dir=DATA_DIR, use_snapshot=True, budget=MEMORY_BUDGET, **indexes):
+        """📦 加载数据（优先读取快照）并构造引擎，``budget`` 见 :func:`~recommender.data.load_movie_data`"""
+        return cls(load_movie_data(data_dir, use_snapshot, budget), **indexes)
+
+    @property
+    def fingerprint(self):
+        return self.data.movie_matrix.fingerprint
+
+    def _index(self, attr, label, build):
+        """第一次用到时构建索引：同时到达的线程只构建一次，构建后交给 ``on_build``（如设为只读）"""
+        index = getattr(self, attr)
+        if index is None:
+            with self._lock:
+                index = getattr(self, attr)
+                if index is None:
+                    with span(label):
+                        index = build()
+                    if index and self.on_build is not None:
+                        self.on_build(index)
+                    setattr(self, attr, index)
+        return index or None
+
+    @property
+    def neighbor_index(self):
+        """🧭 离线构建的近邻索引；未构建或数据已变化时为 None"""
+        return self._index('_neighbor_index', 'engine.load.neighbor_index',
+                           lambda: NeighborIndex.load(self.data.movie_matrix) or False)
+
+    @property
+    def similarity(self):
+        return self._index('_similarity', 'engine.build.similarity',
+                           lambda: PearsonSimilarity(self.data.movie_matrix, self.data.plan.similarity_dtype))
+
+    @property
+    def title_index(self):
+        movies = self.data.movies
+        return self._index('_title_index', 'engine.build.title_index',
+                           lambda: TitleIndex(movies.index, movies['title'], movies['ratings_count']))
+
+    @property
+    def als(self):
+        """🧮 离线训练的矩阵分解模型；未训练或数据已变化时为 None"""
+        return self._index('_als', 'engine.load.als', lambda: ALSModel.load(self.data.movie_matrix) or False)
+
+    @property
+    def user_knn(self):
+        return self._index('_user_knn', 'engine.build.user_knn', lambda: UserKNN(self.data.movie_matrix))
+
+    @property
+    def ann_index(self):
+        """🛰️ 电影数达到 ``ann_min_items`` 时才构建的近似近邻索引，否则为 None"""
+        large = self.data.movie_matrix.n_items >= self.ann_min_items
+        return self._index('_ann_index', 'engine.build.ann_index',
+                           lambda: RandomProjectionIndex(self.similarity) if large else False)
+
+    def updated(self, data, changed):
+        """🔁 数据更新后的新引擎，当前引擎不受影响，可继续服务进行中的查询
+
+        ``changed`` 为评分有变化的电影编码。结果缓存沿用（键中的数据指纹已变化，旧条目不再命中），
+        标题索引只更新热度，近邻索引增量更新；已构建的相似度引擎与近似近邻索引按新矩阵重建，
+        其余索引（相似用户、矩阵分解模型）用到时再构建 / 读取。
+        """
+        neighbor_index = self.neighbor_index
+        similarity = None
+        if neighbor_index is not None or self._similarity is not None:
+            similarity = PearsonSimilarity(data.movie_matrix, data.plan.similarity_dtype)
+        if neighbor_index is not None:
+            neighbor_index = neighbor_index.updated(data.movie_matrix, data.movies['ratings_count'], changed,
+                                                    similarity)
+        title_index = None
+        if self._title_index is not None:
+            title_index = self._title_index.with_popularity(data.movies['ratings_count'])
+        ann_index = None
+        if self._ann_index:
+            old = self._ann_index
+            ann_index = RandomProjectionIndex(similarity, old.dims, old.n_candidates, old.min_ratings)
+        return Engine(data, neighbor_index=neighbor_index or False, similarity=similarity,
+                      title_index=title_index, ann_index=ann_index, ann_min_items=self.ann_min_items,
+                      cache=self.cache, on_build=self.on_build)
+
+    def memory_usage(self):
+        """💾 数据与已构建的各索引占用的字节数（不触发尚未构建的索引），见 :mod:`recommender.memory`"""
+        usage = self.data.memory_usage()
+        indexes = {'similarity': self._similarity, 'neighbor_index': self._neighbor_index,
+                   'title_index': self._title_index, 'ann_index': self._ann_index,
+                   'user_knn': self._user_knn, 'als': self._als}
+        usage.update({name: index.nbytes for name, index in indexes.items() if index})
+        if self.cache is not None:
+            usage['result_cache'] = self.cache.nbytes
+        return usage
+
+    def warm(self, indexes=None):
+        """🔥 立即构建 ``indexes`` 中的索引（长期运行的进程在接收请求前调用），返回自身
+
+        默认按内存方案（``data.plan.warm``）只构建首页用到的索引，其余在第一次用到时构建；
+        传入 :data:`INDEXES` 构建全部索引。
+        """
+        for name in self.data.plan.warm if indexes is None else indexes:
+            getattr(self, name)
+        return self
+
+    def pick_method(self, min_ratings=100):
+        """🧭 ``'auto'`` 时实际采用的方法：覆盖该门槛的近邻索引 > 近似近邻 > 精确计算"""
+        neighbor_index = self.neighbor_index
+        if neighbor_index is not None and neighbor_index.covers(min_ratings):
+            return 'index'
+        ann_index = self.ann_index
+        if ann_index is not None and ann_index.covers(min_ratings):
+            return 'ann'
+        return 'pearson'
+
+    def recommend(self, movie_id, min_ratings=100, method='auto', progress=None):
+        """🎯 与 ``movie_id`` 相似的电影（correlation、support、ratings_count、avg_rating），相关度降序
+
+        只构建所选方法需要的索引；电影不存在时抛出 KeyError。
+        """
+        if method == 'auto':
+            method = self.pick_method(min_ratings)
+        key = self._similar_key(movie_id, min_ratings, method)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        result = self._similar(movie_id, min_ratings, method, progress)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    def _similar(self, movie_id, min_ratings, method, progress=None):
+        return get_movie_recommendations(
+            movie_id, self.data.movie_matrix, self.data.movies, min_ratings,
+            neighbor_index=self.neighbor_index if method == 'index' else None,
+            similarity=self.similarity if method == 'pearson' else None,
+            ann_index=self.ann_index if method == 'ann' else None,
+            method=method, progress=progress,
+        )
+
+    def _similar_key(self, movie_id, min_ratings, method):
+        return 'similar', movie_id, min_ratings, method, self.fingerprint
+
+    def recommend_many(self, queries, method='auto'):
+        """🎯 批量推荐：``queries`` 为 (movie_id, min_ratings) 列表，返回与之对齐的结果列表
+
+        需要精确计算的查询合并为一次（按内存上限分批的）矩阵乘积，同一部电影只算一次；
+        走近邻索引或近似近邻的查询逐个查表，已缓存的结果直接取用。未知电影对应 None。
+        """
+        results = [None] * len(queries)
+        exact = {}
+        for i, (movie_id, min_ratings) in enumerate(queries):
+            if movie_id not in self.data.movie_matrix:
+                continue
+            chosen = self.pick_method(min_ratings) if method == 'auto' else method
+            key = self._similar_key(movie_id, min_ratings, chosen)
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                results[i] = cached
+            elif chosen == 'pearson':
+                exact.setdefault(movie_id, []).append(i)
+            else:
+                results[i] = self._similar(movie_id, min_ratings, chosen)
+                if self.cache is not None:
+                    self.cache.put(key, results[i])
+
+        if not exact:
+            return results
+        similarity = self.similarity
+        movie_ids = list(exact)
+        step = similarity.block_size()
+        for start in range(0, len(movie_ids), step):
+            block = movie_ids[start:start + step]
+            corr, support = similarity.pearson(similarity.items.get_indexer(block))
+            for row, movie_id in enumerate(block):
+                corr_df = pd.DataFrame({'correlation': corr[row], 'support': support[row]},
+                                       index=similarity.items).dropna()
+                for i in exact[movie_id]:
+                    ranked = filter_similar(corr_df, self.data.movies, movie_id, queries[i][1])
+                    results[i] = ranked.sort_values(by='correlation', ascending=False)
+                    if self.cache is not None:
+                        self.cache.put(self._similar_key(movie_id, queries[i][1], 'pearson'), results[i])
+        return results
+
+    def recommend_seeds(self, liked, disliked=(), min_ratings=100, progress=None):
+        """🎞️ 与多部电影相似的电影（:func:`get_seed_recommendations`），结果按种子集合缓存
+
+        ``liked`` / ``disliked`` 为 movieId 列表（权重 1）或 movieId → 权重的字典，不喜欢的电影
+        以负权重参与汇总；同一部电影不能既喜欢又不喜欢。
+        """
+        seeds = {movie_id: float(weight) for movie_id, weight in _weighted(liked).items() if weight}
+        for movie_id, weight in _weighted(disliked).items():
+            if movie_id in seeds:
+                raise ValueError(f"电影 #{movie_id} 不能既喜欢又不喜欢")
+            if weight:
+                seeds[movie_id] = -float(weight)
+        if not seeds:
+            raise ValueError("至少需要一部权重不为 0 的种子电影")
+
+        key = 'seeds', tuple(sorted(seeds.items())), min_ratings, self.fingerprint
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        result = get_seed_recommendations(seeds, self.data.movies, self.similarity, min_ratings, progress)
+        if self.cache is not None:
+            self.cache.put(key, result)
+        return result
+
+    def recommend_for_user(self, user_id, min_ratings=100, method='item', k=50, progress=None):
+        """👤 为用户推荐没看过的电影
+
+        method: 'item' 基于物品（:func:`get_user_recommendations`）/
+        'user' 基于 ``k`` 位相似用户（:func:`get_user_knn_recommendations`）/
+        'als' 矩阵分解因子（:func:`get_als_recommendations`，需先训练模型）
+        """
+        if method == 'item':
+            return get_user_recommendations(user_id, self.data.users, self.data.movies, self.similarity,
+                                            min_ratings, progress)
+        if method == 'user':
+            return get_user_knn_recommendations(user_id, self.data.movie_matrix, self.data.movies,
+                                                self.user_knn, min_ratings, k, progress=progress)
+        if method == 'als':
+            if self.als is None:
+                raise ValueError("矩阵分解模型尚未训练：python -m recommender train-als")
+            return get_als_recommendations(user_id, self.data.movie_matrix, self.data.movies, self.als,
+                                           min_ratings, progress=progress)
+        raise ValueError(f"未知的推荐方法: {method}")
+
+    def rating_stats(self, min_ratings=0):
+        return get_movie_rating_stats(self.data.movies, min_ratings)
+
+    def top_by_genre(self, genre, min_ratings=50):
+        return get_top_movies_by_genre(self.data.movies, self.data.genre_index, genre, min_ratings)
+
+    def search(self, term, limit=SEARCH_LIMIT):
+        return search_movies(self.title_index, term, limit)
+
+    def user_profile(self, user_id):
+        return get_user_rating_stats(self.data.users, user_id)
+
+    def random_picks(self, count=5, min_rating=4.0, min_ratings=50, progress=None, seed=None):
+        return get_random_recommendations(self.data.movies, count, min_rating, min_ratings, progress, seed)
+
+    def movie(self, movie_id):
+        """🎬 movieId → :class:`~recommender.data.MovieInfo`，不存在时抛出 KeyError"""
+        return self.data.info(movie_id)
+
+
+def _weighted(movie_ids):
+    """movieId 列表 → {movieId: 1.0}，字典原样返回"""
+    return dict(movie_ids) if isinstance(movie_ids, dict) else {movie_id: 1.0 for movie_id in movie_ids}
@@ -0,0 +1,98 @@
+"""🎭 电影类型索引 - 位掩码与倒排表
+
+每部电影的类型集合编码为一个 uint64 位掩码（第 i 位对应 ``genres[i]``），同时为每个类型
+保存按 movieId 升序排列的倒排表。类型筛选、多类型的与/或查询都变成位运算或有序数组的集合运算，
+不再对类型字符串做正则匹配。
+"""
+import re
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+# 查询语法：'&' 或 '+' 连接的条件需同时满足，'|' 或 ',' 连接的条件满足其一即可
+_ALL_SEPARATOR = re.compile(r'\s*[&+]\s*')
+_ANY_SEPARATOR = re.compile(r'\s*[|,]\s*')
+
+
+class GenreIndex:
+    """🎭 电影类型的位掩码与倒排索引
+
+    ``movie_ids`` 与 ``genres``（'|' 分隔的类型字符串，可以是 Categorical）按位置对齐；
+    ``masks[i]`` 为第 i 部电影的类型位掩码，``postings[genre]`` 为含该类型的 movieId。
+    """
+
+    def __init__(self, movie_ids, genres):
+        values = pd.Categorical(genres)
+        names = sorted({name for value in values.categories for name in str(value).split('|') if name})
+        if len(names) > 64:
+            raise ValueError(f"类型数超过位掩码容量: {len(names)} > 64")
+
+        self.genres = names
+        self.bits = {name: np.uint64(1) << np.uint64(i) for i, name in enumerate(names)}
+        category_masks = np.array(
+            [self.mask(name for name in str(value).split('|') if name) for value in values.categories]
+            + [0],  # 缺失类型（编码 -1）对应空掩码
+            dtype=np.uint64,
+        )
+        self.movie_ids = np.asarray(movie_ids)
+        self.masks = category_masks[values.codes]
+        self.postings = {name: self.movie_ids[(self.masks & bit) != 0] for name, bit in self.bits.items()}
+
+    def mask(self, genres):
+        """🔢 若干类型合成的位掩码，未知类型抛出 KeyError"""
+        return reduce(np.bitwise_or, (self.bits[name] for name in genres), np.uint64(0))
+
+    def select(self, genres, match='any'):
+        """✅ 每部电影是否满足类型条件的布尔数组：``'any'`` 含其一，``'all'`` 全部包含"""
+        bits = self.mask(genres)
+        if match == 'all':
+            return (self.masks & bits) == bits
+        if match == 'any':
+            return (self.masks & bits) != 0
+        raise ValueError(f"未知的匹配方式: {match}")
+
+    def movies_with(self, genres, match='any'):
+        """🎬 满足类型条件的 movieId（升序），由倒排表求并集 / 交集"""
+        lists = [self.postings[name] for name in genres]
+        if not lists:
+            return self.movie_ids[:0]
+        if match == 'all':
+            return reduce(lambda left, right: np.intersect1d(left, right, assume_unique=True), lists)
+        if match == 'any':
+            return reduce(np.union1d, lists)
+        raise ValueError(f"未知的匹配方式: {match}")
+
+    def match_names(self, term):
+        """🔤 名称包含 ``term`` 的类型（不区分大小写）"""
+        term = term.strip().lower()
+        return [name for name in self.genres if term and term in name.lower()]
+
+    def query(self, text):
+        """🔍 文本查询：每个词匹配名称包含它的类型，'&'/'+' 表示同时包含，'|'/',' 表示包含其一
+
+        例如 ``"sci"`` 匹配 Sci-Fi，``"comedy & romance"`` 要求两种类型都有。
+        """
+        if _ALL_SEPARATOR.search(text.strip()):
+            terms, match = _ALL_SEPARATOR.split(text.strip()), 'all'
+        else:
+            terms, match = _ANY_SEPARATOR.split(text.strip()), 'any'
+        groups = [self.match_names(term) for term in terms if term]
+        if not groups or not all(groups):
+            return self.movie_ids[:0]
+        # 同一个词匹配到的多个类型之间总是"或"
+        selected = [self.select(names, 'any') for names in groups]
+        combined = np.logical_and.reduce(selected) if match == 'all' else np.logical_or.reduce(selected)
+        return self.movie_ids[combined]
+
+    def counts(self, positions=None, weights=None):
+        """📊 每个类型的电影数（或 ``weights`` 加权和），可只统计 ``positions`` 处的电影；降序排列"""
+        masks = self.masks if positions is None else self.masks[positions]
+        if weights is None:
+            weights = np.ones(len(masks), dtype=np.int64)
+        totals = {name: weights[(masks & bit) != 0].sum() for name, bit in self.bits.items()}
+        return pd.Series(totals, name='count').sort_values(ascending=False, kind='stable')
+
+    @property
+    def nbytes(self):
+        return self.masks.nbytes + sum(ids.nbytes for ids in self.postings.values())
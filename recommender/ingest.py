@@ -0,0 +1,206 @@
+"""📥 增量评分写入 - 不重新读取 CSV、不重建全部结构的数据版本更新
+
+新评分（来自 API 调用或只追加的评分文件）在当前数据之上生成一个新版本：
+
+- 评分矩阵只在两种布局中按位置插入 / 覆盖相应单元格（:meth:`RatingMatrix.with_cells`）
+- 电影的评分数、平均分、方差由已有统计量累加（:func:`~recommender.data.update_movie_stats`）
+- 用户的评分数、平均分与类型直方图只重算涉及的用户（:meth:`UserIndex.updated`）
+- 近邻索引只更新涉及变化电影的条目（:meth:`NeighborIndex.updated`）
+
+同一 (用户, 电影) 的多条评分与完整重建一样取均值；低内存方案未保留评分明细时，已有单元格按
+矩阵中的值计一条评分。评分所指的电影必须已在电影表中（新电影的
+标题与类型来自 movies.csv，需要完整重建），否则该条被跳过。新版本构建完成后才替换
+:attr:`RatingIngestor.engine` 这一个引用，正在进行的查询继续使用旧版本。
+"""
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from recommender.data import update_movie_stats
+from recommender.shared import freeze
+
+COLUMNS = ('userId', 'movieId', 'rating', 'timestamp')
+MIN_RATING, MAX_RATING = 0.5, 5.0
+
+
+def normalize_events(events):
+    """🧹 把评分事件（DataFrame、字典列表或 (userId, movieId, rating[, timestamp]) 元组列表）整理为
+    与评分明细同类型的 DataFrame，返回 (有效评分, 无效条数)
+
+    缺少 timestamp 时取当前时间；ID 不是正整数、评分不在 0.5–5.0 之间的条目视为无效。
+    """
+    if not isinstance(events, pd.DataFrame):
+        events = list(events)
+        if events and not isinstance(events[0], dict):
+            events = pd.DataFrame([tuple(event) for event in events], columns=list(COLUMNS[:len(events[0])]))
+        else:
+            events = pd.DataFrame(events, columns=None if events else list(COLUMNS))
+    missing = [column for column in COLUMNS[:3] if column not in events.columns]
+    if missing:
+        raise ValueError(f"评分缺少字段: {', '.join(missing)}")
+
+    frame = pd.DataFrame({column: pd.to_numeric(events[column], errors='coerce') for column in COLUMNS[:3]})
+    frame['timestamp'] = (pd.to_numeric(events['timestamp'], errors='coerce') if 'timestamp' in events.columns
+                          else np.nan)
+    frame['timestamp'] = frame['timestamp'].fillna(int(time.time()))
+    valid = (frame[list(COLUMNS)].notna().all(axis=1)
+             & (frame['userId'] > 0) & (frame['movieId'] > 0)
+             & (frame['userId'] % 1 == 0) & (frame['movieId'] % 1 == 0)
+             & frame['rating'].between(MIN_RATING, MAX_RATING) & (frame['timestamp'] >= 0))
+    frame = frame[valid]
+    typed = pd.DataFrame({
+        'userId': frame['userId'].to_numpy().astype(np.int32),
+        'movieId': frame['movieId'].to_numpy().astype(np.int32),
+        'rating': frame['rating'].to_numpy().astype(np.float32),
+        'timestamp': frame['timestamp'].to_numpy().astype(np.uint32),
+    })
+    return typed, int((~valid).sum())
+
+
+def apply_ratings(data, events):
+    """➕ 在 ``data``（:class:`~recommender.data.MovieData`）之上写入一批评分，返回 (新数据, 报告)
+
+    ``data`` 本身不被修改。报告包含 accepted / invalid / unknown_movies / new_users 计数、
+    ``movies`` 与 ``users``（评分有变化的 movieId / userId 数）以及 ``changed``（变化电影的编码）。
+    """
+    events, invalid = normalize_events(events)
+    known = events['movieId'].isin(data.movies.index).to_numpy()
+    report = {'accepted': int(known.sum()), 'invalid': invalid,
+              'unknown_movies': int((~known).sum()), 'new_users': 0, 'movies': 0, 'users': 0,
+              'changed': np.zeros(0, dtype=np.int64)}
+    events = events[known]
+    if events.empty:
+        return data, report
+
+    matrix = data.movie_matrix
+    code = matrix.items.get_indexer(events['movieId'].to_numpy())
+    user_id = events['userId'].to_numpy()
+    rating = events['rating'].to_numpy()
+
+    pairs = pd.DataFrame({'userId': user_id, 'code': code, 'rating': rating.astype(np.float64)})
+    cells = pairs.groupby(['userId', 'code'], sort=False)['rating'].agg(['sum', 'count']).reset_index()
+    # 已有评分的单元格取全部评分的均值：这种情况很少，只为这些单元格回查评分明细
+    existing, values = _existing_cells(matrix, cells['userId'].to_numpy(), cells['code'].to_numpy())
+    if existing.any() and data.ratings is not None:
+        previous = _previous_ratings(data.ratings, matrix, cells[existing])
+        cells.loc[existing, 'sum'] += previous['sum'].to_numpy()
+        cells.loc[existing, 'count'] += previous['count'].to_numpy()
+    elif existing.any():
+        cells.loc[existing, 'sum'] += values[existing]
+        cells.loc[existing, 'count'] += 1
+
+    movie_matrix, inserted = matrix.with_cells(cells['userId'].to_numpy(), cells['code'].to_numpy(),
+                                               (cells['sum'] / cells['count']).to_numpy())
+    movies = update_movie_stats(data.movies, code, rating, events['timestamp'].to_numpy())
+    changed_users = np.searchsorted(movie_matrix.user_ids, np.unique(user_id))
+    users = data.users.updated(movie_matrix, data.genre_index, inserted, changed_users)
+    ratings = None if data.ratings is None else pd.concat([data.ratings, events], ignore_index=True)
+
+    changed = np.unique(code)
+    report.update(new_users=len(inserted), movies=len(changed), users=len(changed_users), changed=changed)
+    return data.updated(ratings, movies, movie_matrix, users, matrix.items[changed].tolist()), report
+
+
+def _existing_cells(matrix, user_ids, codes):
+    """每个 (用户, 电影编码) 单元格在矩阵中是否已有评分，返回 (是否已有, 已有的值)"""
+    csr = matrix.csr
+    existing = np.zeros(len(user_ids), dtype=bool)
+    values = np.zeros(len(user_ids))
+    rows = np.searchsorted(matrix.user_ids, user_ids)
+    for i, (row, user_id, code) in enumerate(zip(rows.tolist(), user_ids.tolist(), codes.tolist())):
+        if row < len(matrix.user_ids) and matrix.user_ids[row] == user_id:
+            start, end = csr.indptr[row], csr.indptr[row + 1]
+            position = start + np.searchsorted(csr.indices[start:end], code)
+            existing[i] = position < end and csr.indices[position] == code
+            if existing[i]:
+                values[i] = csr.data[position]
+    return existing, values
+
+
+def _previous_ratings(ratings, matrix, cells):
+    """评分明细中这些单元格已有评分的 (sum, count)，与 ``cells`` 行对齐"""
+    movie_ids = matrix.items.to_numpy()[cells['code'].to_numpy()]
+    keys = pd.MultiIndex.from_arrays([cells['userId'].to_numpy(), movie_ids])
+    rows = ratings[ratings['userId'].isin(cells['userId']) & ratings['movieId'].isin(movie_ids)]
+    totals = rows.groupby(['userId', 'movieId'])['rating'].agg(
+        sum=lambda values: values.astype(np.float64).sum(), count='count')
+    return totals.reindex(keys, fill_value=0)
+
+
+class RatingIngestor:
+    """📥 持续接收新评分并原子地发布新的数据版本
+
+    读取方每次查询先取一次 :attr:`engine`，整次查询都使用同一个版本。写入在锁内串行：新版本的
+    数据与索引全部构建完成并冻结为只读（:func:`~recommender.shared.freeze`）后才替换 :attr:`engine`
+    这一个引用，读取方不会看到只更新了一半的结构，已发布的版本也不会再被修改。
+    """
+
+    def __init__(self, engine):
+        self.engine = freeze(engine)
+        self.version = 0
+        self.ingested = 0
+        self.last_report = None
+        self._offsets = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, events, malformed=0):
+        """📥 写入一批评分并发布新版本，返回报告（见 :func:`apply_ratings`，另含 version、fingerprint、seconds）
+
+        ``malformed`` 为解析时已跳过的残缺行数，计入报告的 invalid。
+        """
+        with self._lock:
+            started = time.perf_counter()
+            engine = self.engine
+            data, report = apply_ratings(engine.data, events)
+            report['invalid'] += malformed
+            changed = report.pop('changed')
+            if report['accepted']:
+                self.engine = freeze(engine.updated(data, changed))
+                self.version += 1
+                self.ingested += report['accepted']
+            report.update(version=self.version, fingerprint=self.engine.fingerprint,
+                          seconds=time.perf_counter() - started)
+            self.last_report = report
+            return report
+
+    def ingest_file(self, path, from_start=False):
+        """📄 读取只追加的评分文件（列同 ratings.csv）自上次读取以来新增的完整行并写入
+
+        第一次读取某个文件时从末尾开始（其中已有的评分视为已加载），``from_start`` 时从头读起；
+        文件变短视为被重写，从头读起。字段数不对的残缺行被跳过并计入报告的 invalid，不影响同批的
+        其他行。写入成功后才前移读取位置，写入失败时下次重新读取这些行。没有新行时返回 None，
+        否则返回 :meth:`ingest` 的报告。
+        """
+        size = os.path.getsize(path)
+        offset = self._offsets.setdefault(path, 0 if from_start else size)
+        if size < offset:
+            offset = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+        end = chunk.rfind(b'\n') + 1
+        lines = chunk[:end]
+        if offset == 0 and lines.startswith(b'userId'):
+            lines = lines[lines.find(b'\n') + 1:]
+        if not lines.strip():
+            self._offsets[path] = offset + end
+            return None
+        events = pd.read_csv(io.BytesIO(lines), header=None, names=list(COLUMNS), dtype=str, on_bad_lines='skip')
+        malformed = sum(1 for line in lines.splitlines() if line.strip()) - len(events)
+        report = self.ingest(events, malformed)
+        self._offsets[path] = offset + end
+        return report
+
+    def stats(self):
+        """📊 当前版本号、数据指纹、累计写入的评分数与最近一次写入的报告"""
+        return {
+            'version': self.version,
+            'fingerprint': self.engine.fingerprint,
+            'ingested': self.ingested,
+            'ratings': self.engine.data.n_ratings,
+            'last': self.last_report,
+        }
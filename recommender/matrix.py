@@ -0,0 +1,175 @@
+"""🧮 稀疏评分矩阵 - 以 CSR/CSC 存储用户×电影评分"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class RatingMatrix:
+    """🧮 稀疏用户×电影评分矩阵
+
+    用户与电影都映射为 int32 编码：行按 ``user_ids`` 排序，列按 ``items`` 排序。
+    同时保留 CSR（按用户取行）和 CSC（按电影取列）两种布局，缺失评分不占内存。
+    """
+
+    def __init__(self, csr, user_ids, items, csc=None, fingerprint=None):
+        self.csr = csr.tocsr()
+        self.csc = self.csr.tocsc() if csc is None else csc
+        self.user_ids = np.asarray(user_ids, dtype=np.int32)
+        self.items = pd.Index(items)
+        self.fingerprint = self._fingerprint() if fingerprint is None else fingerprint
+
+    def _fingerprint(self):
+        """🔏 由用户与电影键、每列评分数和评分总和生成的数据指纹，用于校验离线索引（含用户因子）是否过期"""
+        digest = hashlib.sha1()
+        digest.update('\n'.join(map(str, self.items)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(self.user_ids, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(self.csc.indptr).tobytes())
+        digest.update(np.float64(self.csr.data.sum(dtype=np.float64)).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_ratings(cls, users, items, ratings):
+        """📦 由评分明细构建矩阵，重复的 (用户, 电影) 取均值，与 pivot_table 一致"""
+        user_codes, user_ids = pd.factorize(np.asarray(users), sort=True)
+        item_codes, item_keys = pd.factorize(np.asarray(items), sort=True)
+        shape = (len(user_ids), len(item_keys))
+        coords = (user_codes.astype(np.int32), item_codes.astype(np.int32))
+
+        # 两个矩阵由同一组坐标构建，结构完全一致，可以直接按 data 相除
+        totals = sparse.csr_matrix((np.asarray(ratings, dtype=np.float64), coords), shape=shape)
+        counts = sparse.csr_matrix((np.ones(len(user_codes)), coords), shape=shape)
+        totals.data /= counts.data
+        csr = sparse.csr_matrix(
+            (totals.data.astype(np.float32), totals.indices, totals.indptr), shape=shape
+        )
+        return cls(csr, user_ids, item_keys)
+
+    def to_arrays(self):
+        """💾 导出两种布局的底层数组，供快照保存"""
+        return {
+            'csr_data': self.csr.data, 'csr_indices': self.csr.indices, 'csr_indptr': self.csr.indptr,
+            'csc_data': self.csc.data, 'csc_indices': self.csc.indices, 'csc_indptr': self.csc.indptr,
+            'user_ids': self.user_ids,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, items, fingerprint):
+        """📂 由快照数组重建，不复制数据、不重新转换布局"""
+        shape = (len(arrays['user_ids']), len(items))
+        csr = sparse.csr_matrix(
+            (arrays['csr_data'], arrays['csr_indices'], arrays['csr_indptr']), shape=shape
+        )
+        csc = sparse.csc_matrix(
+            (arrays['csc_data'], arrays['csc_indices'], arrays['csc_indptr']), shape=shape
+        )
+        return cls(csr, arrays['user_ids'], items, csc=csc, fingerprint=fingerprint)
+
+    def with_cells(self, user_ids, item_codes, values):
+        """✏️ 写入若干单元格后的新矩阵（不修改当前矩阵），返回 (新矩阵, 新用户在旧用户数组中的插入位置)
+
+        ``(user_ids, item_codes)`` 两两不同；已有的单元格被覆盖，其余插入。新用户按 ID 插入到行的
+        相应位置，插入位置与 ``np.insert`` 的语义一致，之后用户的行编码随之后移。两种布局都只做
+        一次按位置插入的复制，不重新排序、不重新转换布局。
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int32)
+        item_codes = np.asarray(item_codes, dtype=np.int32)
+        values = np.asarray(values, dtype=np.float32)
+        new_users = np.setdiff1d(user_ids, self.user_ids)
+        inserted = np.searchsorted(self.user_ids, new_users).astype(np.int64)
+        all_users = np.insert(self.user_ids, inserted, new_users)
+        rows = np.searchsorted(all_users, user_ids).astype(np.int32)
+        shape = (len(all_users), self.n_items)
+
+        csr_indptr, csc_indices = self.csr.indptr, self.csc.indices
+        if len(new_users):
+            # 旧行编码 → 新行编码；新用户先作为空行插入
+            old_to_new = np.arange(self.n_users) + np.searchsorted(new_users, self.user_ids)
+            counts = np.zeros(len(all_users), dtype=csr_indptr.dtype)
+            counts[old_to_new] = np.diff(csr_indptr)
+            csr_indptr = np.concatenate([[0], np.cumsum(counts)]).astype(csr_indptr.dtype)
+            csc_indices = old_to_new.astype(csc_indices.dtype)[csc_indices]
+
+        csr = sparse.csr_matrix(_merge_cells(csr_indptr, self.csr.indices, self.csr.data,
+                                             rows, item_codes, values), shape=shape)
+        csc = sparse.csc_matrix(_merge_cells(self.csc.indptr, csc_indices, self.csc.data,
+                                             item_codes, rows, values), shape=shape)
+        return RatingMatrix(csr, all_users, self.items, csc=csc), inserted
+
+    @property
+    def n_users(self):
+        return self.csr.shape[0]
+
+    @property
+    def n_items(self):
+        return self.csr.shape[1]
+
+    @property
+    def nnz(self):
+        return self.csr.nnz
+
+    @property
+    def nbytes(self):
+        """💾 两种布局加编码映射占用的字节数"""
+        arrays = [self.csr.data, self.csr.indices, self.csr.indptr,
+                  self.csc.data, self.csc.indices, self.csc.indptr, self.user_ids]
+        return sum(a.nbytes for a in arrays) + int(self.items.memory_usage(deep=True))
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def item_code(self, key):
+        """🔑 电影键 → 列编码，不存在时抛出 KeyError"""
+        return self.items.get_loc(key)
+
+    def user_code(self, user_id):
+        """🔑 用户ID → 行编码，不存在时抛出 KeyError"""
+        code = int(np.searchsorted(self.user_ids, user_id))
+        if code >= len(self.user_ids) or self.user_ids[code] != user_id:
+            raise KeyError(user_id)
+        return code
+
+    def column(self, key):
+        """📋 某部电影的评分：(行编码, 评分)"""
+        code = self.item_code(key)
+        start, end = self.csc.indptr[code], self.csc.indptr[code + 1]
+        return self.csc.indices[start:end], self.csc.data[start:end]
+
+    def item_rating_counts(self):
+        """📊 每部电影的评分用户数"""
+        return pd.Series(np.diff(self.csc.indptr), index=self.items)
+
+    def to_frame(self, rows=None):
+        """📋 展开为稠密 DataFrame（缺失为 NaN），可只取部分用户行；仅适合小规模核对"""
+        block = self.csr if rows is None else self.csr[rows]
+        dense = np.full(block.shape, np.nan, dtype=np.float64)
+        coo = block.tocoo()
+        dense[coo.row, coo.col] = coo.data
+        user_ids = self.user_ids if rows is None else self.user_ids[rows]
+        return pd.DataFrame(dense, index=pd.Index(user_ids, name='userId'), columns=self.items)
+
+
+def _merge_cells(indptr, indices, data, major, minor, values):
+    """把 (主维编码, 次维编码, 值) 合并进压缩存储的数组，返回新的 (data, indices, indptr)
+
+    每个主维切片内的次维编码保持升序：已存在的位置直接覆盖，其余按位置插入。
+    """
+    order = np.lexsort((minor, major))
+    major, minor, values = major[order], minor[order], values[order]
+    positions = np.empty(len(major), dtype=np.int64)
+    exists = np.zeros(len(major), dtype=bool)
+    for i, (row, col) in enumerate(zip(major.tolist(), minor.tolist())):
+        start, end = int(indptr[row]), int(indptr[row + 1])
+        position = start + int(np.searchsorted(indices[start:end], col))
+        positions[i] = position
+        exists[i] = position < end and indices[position] == col
+
+    inserts = positions[~exists]
+    new_indices = np.insert(indices, inserts, minor[~exists].astype(indices.dtype))
+    new_data = np.insert(data, inserts, values[~exists].astype(data.dtype))
+    # 覆盖的位置要加上插在它之前（含同一位置）的新元素个数
+    new_data[positions[exists] + np.searchsorted(inserts, positions[exists], side='right')] = values[exists]
+    added = np.bincount(major[~exists], minlength=len(indptr) - 1)
+    new_indptr = indptr + np.concatenate([[0], np.cumsum(added)]).astype(indptr.dtype)
+    return new_data, new_indices, new_indptr
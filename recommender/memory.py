@@ -0,0 +1,149 @@
+"""💾 内存账目与预算 - 每个常驻结构占多少字节，以及在预算内选用哪种表示
+
+``RECOMMENDER_MEMORY_BUDGET``（如 ``600M``、``1.5G``）为数据与索引的内存预算，不含 Python、
+pandas 与 Streamlit 自身。加载数据时按评分数、用户数、电影数估计各结构的大小，依次尝试：
+
+1. 完整表示：相似度引擎用 float64，保留评分明细 DataFrame
+2. 相似度引擎改用 float32（占用减半，相关系数相差约 1e-5）
+3. 再丢弃评分明细（评分分布改由评分矩阵统计；增量写入时已有单元格按矩阵中的均值计一条）
+
+采用第一个估计值不超过预算的方案，剩余空间（至多结果缓存的默认容量）留给结果缓存；都超出时
+采用最省的方案且不启用结果缓存，由调用方在日志与界面上给出警告。完整表示放得下时启动即构建首页
+（个性化推荐）用到的索引（``warm``），降级的方案不预先构建任何索引，都在第一次用到时构建。离线构建的
+近邻索引与矩阵分解模型大小取决于构建参数，不计入估计，加载后按实际大小记入账目。
+"""
+import logging
+import os
+import re
+from typing import NamedTuple
+
+import pandas as pd
+
+from recommender.ann import ANN_MIN_ITEMS, DIMS
+from recommender.cache import DEFAULT_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 ** 2
+
+# 估计各结构大小的系数（字节），由 ml-latest-small 与 1m 规模的合成数据实测校准
+RATING_ROW_BYTES = 16          # 评分明细每行：userId / movieId int32 + rating float32 + timestamp uint32
+MATRIX_RATING_BYTES = 16       # 评分矩阵每条评分：CSR 与 CSC 各一份 float32 取值 + int32 下标
+SIMILARITY_VALUE_ARRAYS = 5    # 相似度引擎每条评分：两个方向的中心化值与平方值，加共用的全 1 掩码
+USER_KNN_RATING_BYTES = 12     # 相似用户索引每条评分：中心化值 + 归一化转置的取值与下标（float32 / int32）
+MOVIE_BYTES = {                # 每部电影
+    'movies': 96,              # 统计表（标题字符串占大头）
+    'metadata': 800,           # MovieInfo 元组及其中的 Python 对象
+    'title_index': 288,        # 三元组倒排表与标题键
+    'genre_index': 24,         # 位掩码与倒排表
+}
+USER_BYTES = 88                # 每位用户：评分数 / 平均分 / 类型直方图
+
+# 从完整到最省依次尝试的表示：(相似度引擎的取值类型, 是否保留评分明细)
+REPRESENTATIONS = (('float64', True), ('float32', True), ('float32', False))
+# 完整表示时启动即构建的索引：标题搜索、相似度引擎与（电影足够多时的）近似近邻索引
+STARTUP_INDEXES = ('title_index', 'similarity', 'ann_index')
+
+
+class MemoryPlan(NamedTuple):
+    """📐 在预算内选定的表示、各结构的估计字节数与启动时预先构建的索引"""
+    budget: int | None
+    similarity_dtype: str
+    keep_ratings: bool
+    cache_bytes: int
+    estimate: dict
+    fits: bool
+    warm: tuple = ()
+
+    @property
+    def estimated_bytes(self):
+        return sum(self.estimate.values())
+
+    def describe(self):
+        """📝 一行说明：选用的表示、估计占用与预算"""
+        parts = [f"相似度 {self.similarity_dtype}", "保留评分明细" if self.keep_ratings else "丢弃评分明细",
+                 f"结果缓存 {self.cache_bytes / MB:.0f} MB", f"估计 {self.estimated_bytes / MB:.0f} MB",
+                 f"预先构建 {' / '.join(self.warm) or '无'}"]
+        if self.budget is not None:
+            parts.append(f"预算 {self.budget / MB:.0f} MB")
+        return "，".join(parts)
+
+
+def parse_bytes(text):
+    """🔢 ``'600M'`` / ``'1.5G'`` / ``'512MB'`` / 纯字节数 → 字节数；空值为 None（不限）"""
+    if text is None or not str(text).strip():
+        return None
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*', str(text), flags=re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"无法解析的内存大小: {text!r}（示例: 600M、1.5G）")
+    number, unit = match.groups()
+    return int(float(number) * 1024 ** ('KMGT'.index(unit.upper()) + 1 if unit else 0))
+
+
+def estimate(n_ratings, n_users, n_items, similarity_dtype='float64', keep_ratings=True):
+    """📏 各常驻结构的估计字节数，名称与 :meth:`Engine.memory_usage` 一致"""
+    value_bytes = 4 if similarity_dtype == 'float32' else 8
+    sizes = {
+        'movie_matrix': MATRIX_RATING_BYTES * n_ratings + 12 * n_users + 8 * n_items,
+        **{name: per_item * n_items for name, per_item in MOVIE_BYTES.items()},
+        'users': USER_BYTES * n_users,
+        'similarity': SIMILARITY_VALUE_ARRAYS * value_bytes * n_ratings + 8 * n_items,
+        'user_knn': USER_KNN_RATING_BYTES * n_ratings + 16 * n_users + 4 * n_items,
+    }
+    if keep_ratings:
+        sizes['ratings'] = RATING_ROW_BYTES * n_ratings
+    if n_items >= ANN_MIN_ITEMS:
+        # 草图（float32）与投影矩阵（int8）
+        sizes['ann_index'] = 4 * DIMS * n_items + DIMS * n_users
+    return sizes
+
+
+def plan_memory(n_ratings, n_users, n_items, budget=None, max_cache_bytes=DEFAULT_MAX_BYTES):
+    """📐 选出估计值不超过 ``budget`` 字节的最完整表示，``budget`` 为 None 时不限"""
+    for representation, (similarity_dtype, keep_ratings) in enumerate(REPRESENTATIONS):
+        sizes = estimate(n_ratings, n_users, n_items, similarity_dtype, keep_ratings)
+        headroom = None if budget is None else budget - sum(sizes.values())
+        if headroom is None or headroom >= 0:
+            cache_bytes = max_cache_bytes if headroom is None else min(max_cache_bytes, headroom)
+            warm = tuple(name for name in STARTUP_INDEXES if name in sizes) if representation == 0 else ()
+            return MemoryPlan(budget, similarity_dtype, keep_ratings, cache_bytes, sizes, True, warm)
+    return MemoryPlan(budget, similarity_dtype, keep_ratings, 0, sizes, False)
+
+
+def usage_table(usage, plan=None):
+    """📊 各结构的实际占用（MB，降序），给出 ``plan`` 时附带估计值"""
+    table = pd.DataFrame({'MB': pd.Series(usage, dtype=float) / MB})
+    if plan is not None:
+        table['估计 MB'] = pd.Series(plan.estimate, dtype=float) / MB
+    return table.sort_values('MB', ascending=False, kind='stable')
+
+
+def log_usage(usage, plan, log=None):
+    """📝 输出内存账目：选用的表示、各结构的占用，超出预算时给出警告（默认写入本模块的日志）"""
+    warn = log or logger.warning
+    log = log or logger.info
+    log(f"💾 内存方案：{plan.describe()}")
+    total = sum(usage.values())
+    for name, nbytes in sorted(usage.items(), key=lambda item: -item[1]):
+        log(f"   {name:<15} {nbytes / MB:8.1f} MB")
+    log(f"   {'total':<15} {total / MB:8.1f} MB")
+    for warning in budget_warnings(usage, plan):
+        warn(f"⚠️ {warning}")
+
+
+def budget_warnings(usage, plan):
+    """⚠️ 预算相关的警告：最省的方案也超出预算，或实际占用已超出预算"""
+    messages = []
+    if not plan.fits:
+        messages.append(f"最省的内存方案估计需要 {plan.estimated_bytes / MB:.0f} MB，"
+                        f"超出预算 {plan.budget / MB:.0f} MB，已关闭结果缓存")
+    total = sum(usage.values())
+    if plan.budget is not None and total > plan.budget:
+        largest = max(usage, key=usage.get)
+        messages.append(f"数据与索引实际占用 {total / MB:.0f} MB，超出预算 {plan.budget / MB:.0f} MB"
+                        f"（最大的是 {largest}：{usage[largest] / MB:.0f} MB）")
+    return messages
+
+
+# 数据与索引的内存预算（字节），未设置时不限
+MEMORY_BUDGET = parse_bytes(os.environ.get('RECOMMENDER_MEMORY_BUDGET'))
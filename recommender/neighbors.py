@@ -0,0 +1,153 @@
+"""🧭 离线构建的电影近邻索引
+
+为每部电影预先保存相关系数最高的 K 部电影（含共同评分人数），推荐时只需 O(K) 查表。
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from recommender.data import CACHE_DIR
+from recommender.similarity import BLOCK_BYTES, PearsonSimilarity, select_top_k
+
+NEIGHBOR_INDEX_PATH = os.path.join(CACHE_DIR, 'neighbors.npz')
+
+
+class NeighborIndex:
+    """🧭 每部电影的 top-K 相似电影
+
+    ``neighbors``/``correlations``/``supports`` 均为 (电影数, K) 数组，按相关系数降序排列，
+    不足 K 个时以 -1 填充。只有评分数不少于 ``min_ratings`` 的电影才会作为近邻入选，
+    因此查询的最小评分数低于该值时应回退到精确计算。
+    """
+
+    def __init__(self, items, neighbors, correlations, supports, min_ratings, fingerprint):
+        self.items = pd.Index(items)
+        self.neighbors = neighbors
+        self.correlations = correlations
+        self.supports = supports
+        self.min_ratings = int(min_ratings)
+        self.fingerprint = str(fingerprint)
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    @property
+    def nbytes(self):
+        return self.neighbors.nbytes + self.correlations.nbytes + self.supports.nbytes
+
+    @classmethod
+    def build(cls, movie_matrix, item_counts, k=100, min_ratings=50, similarity=None, log=None):
+        """🏗️ 分批计算全部电影的相关系数并保留 top-K"""
+        similarity = similarity or PearsonSimilarity(movie_matrix)
+        counts = item_counts.reindex(movie_matrix.items).fillna(0).to_numpy()
+        n_items = movie_matrix.n_items
+
+        neighbors = np.full((n_items, k), -1, dtype=np.int32)
+        correlations = np.full((n_items, k), np.nan, dtype=np.float32)
+        supports = np.zeros((n_items, k), dtype=np.int32)
+
+        started = time.perf_counter()
+        for codes, block_neighbors, block_corr, block_support in similarity.top_k(
+                k, eligible=counts >= min_ratings):
+            neighbors[codes] = block_neighbors
+            correlations[codes] = block_corr
+            supports[codes] = block_support
+            if log is not None:
+                log(f"{codes[-1] + 1}/{n_items} 部电影，用时 {time.perf_counter() - started:.1f}s")
+
+        return cls(movie_matrix.items, neighbors, correlations, supports,
+                   min_ratings, movie_matrix.fingerprint)
+
+    def updated(self, movie_matrix, item_counts, changed, similarity=None, block_bytes=BLOCK_BYTES):
+        """🔁 部分电影的评分变化后的索引（不修改当前索引），结果与在新数据上重新构建一致
+
+        两部电影的相关系数只取决于它们自己的评分，因此只有涉及 ``changed``（电影编码）的条目会变：
+        其余每一行先去掉这些电影，再与它们的新相关系数合并取 top-K。原本装满 K 个的行如果合并后的
+        第 K 名低于原来的第 K 名，空出的名次可能属于从未入选的电影，这些行与 ``changed`` 的行一起重算。
+        """
+        similarity = similarity or PearsonSimilarity(movie_matrix)
+        changed = np.unique(np.asarray(changed, dtype=np.int64))
+        counts = item_counts.reindex(movie_matrix.items).fillna(0).to_numpy()
+        eligible = counts >= self.min_ratings
+        n_items, k = len(self.neighbors), self.k
+
+        stale = np.isin(self.neighbors, changed)
+        stale_rows = stale.any(axis=1)
+        neighbors = np.where(stale, -1, self.neighbors)
+        correlations = np.where(stale, np.nan, self.correlations)
+        supports = np.where(stale, 0, self.supports)
+        step = similarity.block_size(n_items + k, block_bytes)
+        for start in range(0, len(changed), step):
+            block = changed[start:start + step]
+            corr, support = similarity.pearson(block)
+            # 变化的电影作为候选：须达到评分数门槛，且不是该行电影自身
+            candidates = corr.T
+            candidates[:, ~eligible[block]] = np.nan
+            candidates[block, np.arange(len(block))] = np.nan
+            # 只有去掉了条目、或与这些电影有共同评分者的行才会变化
+            rows = np.flatnonzero(stale_rows | ~np.isnan(candidates).all(axis=1))
+            combined_ids = np.hstack([neighbors[rows],
+                                      np.broadcast_to(block.astype(np.int32), (len(rows), len(block)))])
+            top, correlations[rows], supports[rows] = select_top_k(np.hstack([correlations[rows], candidates[rows]]),
+                                                                   np.hstack([supports[rows], support.T[rows]]), k)
+            top = np.take_along_axis(combined_ids, np.maximum(top, 0), axis=1)
+            neighbors[rows] = np.where(np.isnan(correlations[rows]), -1, top)
+
+        was_full = self.neighbors[:, -1] >= 0
+        shrunk = was_full & ((neighbors[:, -1] < 0) | (correlations[:, -1] < self.correlations[:, -1]))
+        recompute = np.union1d(changed, np.flatnonzero(shrunk))
+        for codes, block_neighbors, block_corr, block_support in similarity.top_k(
+                k, eligible=eligible, codes=recompute, block_bytes=block_bytes):
+            neighbors[codes] = block_neighbors
+            correlations[codes] = block_corr
+            supports[codes] = block_support
+
+        return NeighborIndex(movie_matrix.items, neighbors.astype(np.int32), correlations.astype(np.float32),
+                             supports.astype(np.int32), self.min_ratings, movie_matrix.fingerprint)
+
+    def covers(self, min_ratings):
+        """✅ 该最小评分数下的查询能否由索引回答"""
+        return min_ratings >= self.min_ratings
+
+    def lookup(self, key):
+        """🔎 某部电影的近邻：DataFrame(correlation, support)，按相关系数降序"""
+        code = self.items.get_loc(key)
+        valid = self.neighbors[code] >= 0
+        return pd.DataFrame({
+            'correlation': self.correlations[code][valid].astype(np.float64),
+            'support': self.supports[code][valid],
+        }, index=self.items[self.neighbors[code][valid]])
+
+    def save(self, path=NEIGHBOR_INDEX_PATH):
+        """💾 保存为 .npz 文件"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(
+            tmp_path,
+            neighbors=self.neighbors,
+            correlations=self.correlations,
+            supports=self.supports,
+            min_ratings=self.min_ratings,
+            fingerprint=self.fingerprint,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, movie_matrix, path=NEIGHBOR_INDEX_PATH):
+        """📂 读取索引文件；文件不存在或不是由当前评分数据构建时返回 None"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as archive:
+            if str(archive['fingerprint']) != movie_matrix.fingerprint:
+                return None
+            return cls(
+                movie_matrix.items,
+                archive['neighbors'],
+                archive['correlations'],
+                archive['supports'],
+                archive['min_ratings'],
+                archive['fingerprint'],
+            )
@@ -0,0 +1,35 @@
+"""⏱️ 分阶段进度报告
+
+推荐等耗时操作按阶段（load、similarity、filter、rank）推进，每完成一个阶段通过回调报告
+真实的进度与耗时，界面据此驱动进度条，不再用固定的 sleep 动画。
+"""
+import time
+
+PHASES = ('load', 'similarity', 'filter', 'rank')
+
+
+class Progress:
+    """⏱️ 阶段进度
+
+    每完成一个阶段调用 ``done(phase)``，回调收到 ``(阶段名, 已完成比例, 该阶段耗时秒数)``；
+    ``timings`` 按完成顺序记录各阶段耗时。没有回调时只计时。
+    """
+
+    def __init__(self, callback=None, phases=PHASES):
+        self.callback = callback
+        self.phases = tuple(phases)
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def done(self, phase):
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.timings[phase] = elapsed
+        if self.callback is not None:
+            self.callback(phase, (self.phases.index(phase) + 1) / len(self.phases), elapsed)
+        return elapsed
+
+    @property
+    def total(self):
+        return sum(self.timings.values())
@@ -0,0 +1,201 @@
+"""🔤 电影标题搜索索引 - 三元组倒排表与分级排序
+
+标题先去掉结尾的年份、转小写并去除重音符号（Amélie → amelie），"Matrix, The" 这类后置冠词
+额外索引一份 "the matrix"。每个检索键按三字符片段（三元组）建立倒排表，查询时统计候选标题
+命中的三元组数，再按 完全相同 > 前缀 > 子串 > 近似（容忍拼写错误）分级排序，同级按热度排序。
+"""
+import bisect
+import copy
+import re
+import unicodedata
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# 近似匹配的最低得分：查询三元组（含首尾边界）在标题中出现的比例
+FUZZY_MIN_SCORE = 0.5
+
+EXACT, PREFIX, SUBSTRING, FUZZY = range(4)
+
+_YEAR_SUFFIX = re.compile(r'\s*\((\d{4})(?:[-–]\d{0,4})?\)\s*$')
+_QUERY_YEAR = re.compile(r'\(?\b(1[89]\d\d|20\d\d)\b\)?')
+_TRAILING_ARTICLE = re.compile(r"^(.*), (the|a|an|le|la|les|l'|il|el|der|die|das)$")
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """🔡 小写、去除重音符号，非字母数字字符折叠为单个空格"""
+    text = str(text)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def split_year(title):
+    """📅 "Heat (1995)" → ("Heat", 1995)；没有年份时年份为 None"""
+    match = _YEAR_SUFFIX.search(title)
+    if match is None:
+        return title.strip(), None
+    return title[:match.start()].strip(), int(match.group(1))
+
+
+def title_keys(name):
+    """🔑 标题（不含年份）的检索键：规范化后的原名，后置冠词的标题再加一份前置形式"""
+    lowered = str(name).strip().lower()
+    keys = [normalize(lowered)]
+    match = _TRAILING_ARTICLE.match(lowered)
+    if match:
+        keys.append(normalize(f"{match.group(2)} {match.group(1)}"))
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _grams(key):
+    """检索键的倒排片段（可能重复）：带首尾边界的三元组，外加单字符与双字符片段供短查询使用"""
+    padded = f' {key} '
+    return ([padded[i:i + 3] for i in range(len(padded) - 2)]
+            + [key[i:i + 2] for i in range(len(key) - 1)] + list(key))
+
+
+class TitleIndex:
+    """🔤 标题三元组倒排索引
+
+    ``movie_ids`` 与 ``titles`` 按位置对齐，``popularity``（例如评分数）用于同级结果排序。
+    倒排表以 CSR 形式保存：片段 ``g`` 的检索键编号为 ``postings[indptr[g]:indptr[g + 1]]``。
+    """
+
+    def __init__(self, movie_ids, titles, popularity=None):
+        self.movie_ids = np.asarray(movie_ids)
+        self.years = np.zeros(len(self.movie_ids), dtype=np.int16)
+        self.popularity = (np.zeros(len(self.movie_ids)) if popularity is None
+                           else np.asarray(popularity, dtype=np.float64))
+
+        keys, owners = [], []
+        for position, title in enumerate(titles):
+            name, year = split_year(str(title))
+            self.years[position] = year or 0
+            for key in title_keys(name):
+                keys.append(key)
+                owners.append(position)
+        self.keys = keys
+        self.key_owner = np.asarray(owners, dtype=np.int32)
+        # 排序后的检索键：完全相同与前缀匹配都是二分查找得到的一段区间
+        self._key_order = np.argsort(np.asarray(keys, dtype=object), kind='stable').astype(np.int32)
+        self._sorted_keys = [keys[i] for i in self._key_order]
+
+        grams = [_grams(key) for key in keys]
+        flat = np.fromiter(chain.from_iterable(grams), dtype=object, count=sum(map(len, grams)))
+        gram_codes, vocabulary = pd.factorize(flat)
+        key_codes = np.repeat(np.arange(len(keys), dtype=np.int64), [len(g) for g in grams])
+        # 去掉同一检索键内重复的片段，同时按 (片段, 检索键) 排序
+        pairs = np.sort(gram_codes.astype(np.int64) * max(len(keys), 1) + key_codes)
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+        gram_codes = pairs // max(len(keys), 1)
+        self._gram_ids = dict(zip(vocabulary, range(len(vocabulary))))
+        self._postings = (pairs % max(len(keys), 1)).astype(np.int32)
+        self._indptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_codes, minlength=len(vocabulary)), out=self._indptr[1:])
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def with_popularity(self, popularity):
+        """🔁 只替换热度（例如评分数变化后）的新索引，与当前索引共享检索结构"""
+        index = copy.copy(self)
+        index.popularity = np.asarray(popularity, dtype=np.float64)
+        return index
+
+    @property
+    def nbytes(self):
+        return (self._postings.nbytes + self._indptr.nbytes + self.key_owner.nbytes + self._key_order.nbytes
+                + self.years.nbytes + self.popularity.nbytes + sum(len(key) for key in self.keys))
+
+    def search(self, query, limit=50):
+        """🔍 按相关度排序的 movieId，最多 ``limit`` 个
+
+        查询中的四位年份（可带括号）只用于过滤，例如 ``"heat 1995"``；只有年份时返回该年的电影。
+        """
+        year = None
+        match = _QUERY_YEAR.search(query)
+        if match:
+            year = int(match.group(1))
+            query = query[:match.start()] + ' ' + query[match.end():]
+        text = normalize(query)
+
+        if not text:
+            if year is None:
+                return self.movie_ids[:0]
+            positions = np.flatnonzero(self.years == year)
+            tiers = np.full(len(positions), EXACT)
+            scores = np.ones(len(positions))
+        else:
+            key_ids, tiers, scores = self._match(text)
+            positions = self.key_owner[key_ids]
+            if year is not None:
+                keep = self.years[positions] == year
+                positions, tiers, scores = positions[keep], tiers[keep], scores[keep]
+
+        # 同一部电影的多个检索键只保留最好的一个
+        order = np.lexsort((-self.popularity[positions], -scores, tiers))
+        positions = positions[order]
+        _, first = np.unique(positions, return_index=True)
+        positions = positions[np.sort(first)]
+        return self.movie_ids[positions[:limit]]
+
+    def _match(self, text):
+        """返回 (检索键编号, 级别, 得分)"""
+        if len(text) < 3:
+            # 一两个字符的查询直接取该片段的倒排表，都是子串
+            key_ids = np.flatnonzero(self._hits({text}))
+            return key_ids, self._tiers(text, key_ids), np.ones(len(key_ids))
+
+        core = _trigrams(text)
+        edges = _trigrams(f' {text} ') - core
+        core_hits = self._hits(core)
+        hits = core_hits + self._hits(edges)
+        scores = hits / (len(core) + len(edges))
+
+        # 含全部内部三元组的才可能是子串，逐个核对；其余按得分作为近似匹配
+        full = np.flatnonzero(core_hits == len(core))
+        tiers = self._tiers(text, full)
+        fuzzy = np.flatnonzero((scores >= FUZZY_MIN_SCORE) & (core_hits < len(core))
+                               & (core_hits >= FUZZY_MIN_SCORE * len(core)))
+        unverified = full[tiers == FUZZY]
+        fuzzy = np.concatenate([fuzzy, unverified[scores[unverified] >= FUZZY_MIN_SCORE]])
+
+        key_ids = np.concatenate([full[tiers < FUZZY], fuzzy])
+        tiers = np.concatenate([tiers[tiers < FUZZY], np.full(len(fuzzy), FUZZY)])
+        return key_ids, tiers, scores[key_ids]
+
+    def _hits(self, grams):
+        """每个检索键命中的三元组数"""
+        slices = [self._postings[self._indptr[g]:self._indptr[g + 1]]
+                  for g in (self._gram_ids.get(gram) for gram in grams) if g is not None]
+        if not slices:
+            return np.zeros(len(self.keys), dtype=np.int64)
+        return np.bincount(np.concatenate(slices), minlength=len(self.keys))
+
+    def _tiers(self, text, key_ids):
+        """候选检索键的级别：前缀与完全相同由二分查找确定，其余逐个核对是否为子串"""
+        start = bisect.bisect_left(self._sorted_keys, text)
+        exact_end = bisect.bisect_right(self._sorted_keys, text)
+        prefix_end = bisect.bisect_left(self._sorted_keys, text + '\uffff')
+        tier_of = np.full(len(self.keys), FUZZY, dtype=np.int8)
+        tier_of[self._key_order[start:prefix_end]] = PREFIX
+        tier_of[self._key_order[start:exact_end]] = EXACT
+
+        tiers = tier_of[key_ids]
+        rest = np.flatnonzero(tiers == FUZZY)
+        if len(text) <= 3:
+            # 候选本来就包含整个查询片段，必然是子串
+            tiers[rest] = SUBSTRING
+        else:
+            for i in rest:
+                if text in self.keys[key_ids[i]]:
+                    tiers[i] = SUBSTRING
+        return tiers
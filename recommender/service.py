@@ -0,0 +1,351 @@
+"""🌐 推荐 JSON API - 基于 asyncio 的 HTTP/1.1 服务
+
+与界面共用同一套内存结构（:class:`~recommender.engine.Engine`），只依赖标准库：
+
+- ``GET /similar?movie_id=1&min_ratings=100&top_n=10&threshold=0``：相似电影
+- ``GET /top?genre=Comedy&min_ratings=50&top_n=20``：类型排行
+- ``GET /search?q=matrix&limit=20``：标题搜索
+- ``GET /users/<user_id>``：用户画像
+- ``GET /metrics``：各接口的延迟直方图、请求合并、结果缓存与数据版本的统计，开启计时时附带各计时段的直方图
+- ``POST /ratings``（需开启写入）：写入新评分，请求体为评分对象或其列表
+  ``{"userId": 1, "movieId": 2, "rating": 4.5, "timestamp": 964982703}``
+
+连接默认保持（keep-alive），空闲超过 ``IDLE_TIMEOUT`` 秒后关闭。同一时间窗口内到达的
+相似电影查询合并为一次批量计算（:meth:`Engine.recommend_many`）；所有引擎查询都在线程池中执行，
+不阻塞事件循环。新评分（``POST /ratings`` 或跟踪的评分文件）由
+:class:`~recommender.ingest.RatingIngestor` 增量写入，新版本就绪后原子切换，之后的请求使用新数据。
+"""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from recommender.engine import SEARCH_LIMIT
+from recommender.ingest import RatingIngestor
+from recommender.timing import METRICS_PATH, TIMER, LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# 相似电影查询的合并窗口（秒）与单批上限
+BATCH_WINDOW = 0.002
+BATCH_MAX = 64
+# 空闲连接的保持时间（秒）
+IDLE_TIMEOUT = 15
+MAX_HEADER_BYTES = 16 * 1024
+
+# 跟踪评分文件的轮询间隔（秒）
+FOLLOW_INTERVAL = 1.0
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SimilarBatcher:
+    """🧺 合并并发的相似电影查询：窗口期内到达的查询一起交给线程池做一次批量计算
+
+    ``current_engine`` 返回当前版本的引擎，同一批查询使用同一个版本；每个查询得到 (引擎, 结果)，
+    调用方用同一个引擎查电影信息，不会与期间切换的新版本混用。
+    """
+
+    def __init__(self, current_engine, executor, window=BATCH_WINDOW, max_batch=BATCH_MAX):
+        self.current_engine = current_engine
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = []
+        self.batches = 0
+        self.batched_queries = 0
+        self._timer = None
+
+    async def submit(self, movie_id, min_ratings):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append(((movie_id, min_ratings), future))
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.batched_queries += len(batch)
+        queries = [query for query, _ in batch]
+        engine = self.current_engine()
+        task = asyncio.get_running_loop().run_in_executor(self.executor, engine.recommend_many, queries)
+        task.add_done_callback(lambda done: self._resolve(batch, engine, done))
+
+    @staticmethod
+    def _resolve(batch, engine, done):
+        error = done.exception()
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((engine, done.result()[i]))
+
+
+class RecommendationService:
+    """🌐 把引擎的查询映射为 JSON 接口，并按接口记录延迟
+
+    ``writable`` 时开放 ``POST /ratings``；每个请求开始时取一次当前版本的引擎。
+    """
+
+    def __init__(self, engine, workers=4, batch_window=BATCH_WINDOW, batch_max=BATCH_MAX, writable=False):
+        self.ingestor = RatingIngestor(engine.warm())
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recommender')
+        self.batcher = SimilarBatcher(lambda: self.engine, self.executor, batch_window, batch_max)
+        self.latency = {}
+        self.routes = {
+            '/similar': self.similar,
+            '/top': self.top,
+            '/search': self.search,
+            '/metrics': self.metrics,
+        }
+        self.writes = {'/ratings': self.ratings} if writable else {}
+
+    @property
+    def engine(self):
+        return self.ingestor.engine
+
+    async def dispatch(self, method, target, payload=b''):
+        """返回 (状态码, JSON 可序列化的响应体)"""
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip('/') or '/'
+        if path.startswith('/users/'):
+            endpoint, handler = '/users', self.user
+            params['user_id'] = path[len('/users/'):]
+        else:
+            endpoint, handler = path, self.routes.get(path) or self.writes.get(path)
+        expected = 'POST' if path in self.writes else 'GET'
+
+        started = time.perf_counter()
+        try:
+            if handler is None:
+                raise HttpError(404, f"未知的接口: {path}")
+            if method != expected:
+                raise HttpError(405, f"只支持 {expected}: {method}")
+            if expected == 'POST':
+                params['payload'] = payload
+            status, body = 200, await handler(params)
+        except HttpError as error:
+            status, body = error.status, {'error': str(error)}
+        except Exception as error:  # 单个请求出错不影响连接上的其他请求
+            status, body = 500, {'error': f"{type(error).__name__}: {error}"}
+        if handler is not None:
+            histogram = self.latency.setdefault(endpoint, LatencyHistogram())
+            histogram.observe((time.perf_counter() - started) * 1000)
+            if METRICS_PATH:
+                TIMER.export(METRICS_PATH)
+        return status, body
+
+    @staticmethod
+    def movie(engine, movie_id, **fields):
+        info = engine.movie(movie_id)
+        return {'movieId': int(movie_id), 'title': info.title, 'genres': info.genres, **fields}
+
+    async def similar(self, params):
+        movie_id = _int(params, 'movie_id')
+        min_ratings = _int(params, 'min_ratings', 100)
+        top_n = _int(params, 'top_n', 10)
+        threshold = _float(params, 'threshold', 0.0)
+        engine, result = await self.batcher.submit(movie_id, min_ratings)
+        if result is None:
+            raise HttpError(404, f"电影 #{movie_id} 在数据库中未找到")
+        result = result[result['correlation'] >= threshold].head(top_n)
+        return {
+            'movie': self.movie(engine, movie_id),
+            'results': [
+                self.movie(engine, similar_id, correlation=round(float(row.correlation), 4),
+                           support=int(row.support), ratings_count=int(row.ratings_count),
+                           avg_rating=round(float(row.avg_rating), 2))
+                for similar_id, row in zip(result.index, result.itertuples(index=False))
+            ],
+        }
+
+    async def run(self, func, *args):
+        """在线程池中执行一次引擎查询，事件循环继续处理其他连接"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def top(self, params):
+        genre = params.get('genre')
+        min_ratings = _int(params, 'min_ratings', 50)
+        top_n = _int(params, 'top_n', 20)
+        return await self.run(self._top, self.engine, genre, min_ratings, top_n)
+
+    def _top(self, engine, genre, min_ratings, top_n):
+        if genre:
+            try:
+                ranked = engine.top_by_genre(genre, min_ratings)
+            except KeyError:
+                raise HttpError(404, f"未知的类型: {genre}") from None
+        else:
+            ranked = engine.rating_stats(min_ratings).sort_values('avg_rating', ascending=False)
+        ranked = ranked.head(top_n)
+        return {
+            'genre': genre,
+            'results': [
+                self.movie(engine, movie_id, avg_rating=float(row.avg_rating),
+                           rating_count=int(row.rating_count), bayes_rating=float(row.bayes_rating))
+                for movie_id, row in zip(ranked.index, ranked.itertuples(index=False))
+            ],
+        }
+
+    async def search(self, params):
+        query = params.get('q', '')
+        if not query.strip():
+            raise HttpError(400, "缺少参数 q")
+        limit = _int(params, 'limit', 20)
+        return await self.run(self._search, self.engine, query, limit)
+
+    def _search(self, engine, query, limit):
+        movie_ids = engine.search(query, min(limit, SEARCH_LIMIT))
+        return {'query': query, 'results': [self.movie(engine, movie_id) for movie_id in movie_ids]}
+
+    async def user(self, params):
+        user_id = _int(params, 'user_id')
+        return await self.run(self._user, self.engine, user_id)
+
+    def _user(self, engine, user_id):
+        profile = engine.user_profile(user_id)
+        if profile is None:
+            raise HttpError(404, f"用户 {user_id} 不存在")
+        return {
+            'userId': user_id,
+            'total_movies': profile['total_movies'],
+            'avg_rating': profile['avg_rating'],
+            'favorite_genres': {genre: int(count) for genre, count in profile['favorite_genres'].items()},
+        }
+
+    async def metrics(self, params):
+        return {
+            'latency': {endpoint: histogram.to_dict() for endpoint, histogram in sorted(self.latency.items())},
+            'batching': {'batches': self.batcher.batches, 'queries': self.batcher.batched_queries},
+            'cache': self.engine.cache.stats() if self.engine.cache is not None else None,
+            'data': self.ingestor.stats(),
+            'spans': TIMER.snapshot() if TIMER.enabled else None,
+        }
+
+    async def ratings(self, params):
+        try:
+            events = json.loads(params['payload'] or b'null')
+        except ValueError:
+            raise HttpError(400, "请求体不是合法的 JSON") from None
+        if isinstance(events, dict):
+            events = [events]
+        if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+            raise HttpError(400, "请求体应为评分对象或其列表")
+        try:
+            return await self.run(self.ingestor.ingest, events)
+        except ValueError as error:
+            raise HttpError(400, str(error)) from None
+
+    async def follow(self, path, interval=FOLLOW_INTERVAL):
+        """📄 定期读取只追加的评分文件的新行并写入（从启动时的文件末尾开始）"""
+        while True:
+            try:
+                await self.run(self.ingestor.ingest_file, path)
+            except (OSError, ValueError) as error:  # 读取位置未前移，下次重新读取这些行
+                logger.warning("读取评分文件 %s 失败，%s 秒后重试: %s: %s", path, interval,
+                               type(error).__name__, error)
+            await asyncio.sleep(interval)
+
+    async def handle_connection(self, reader, writer):
+        """🔌 一个连接上依次处理多个请求，直到客户端要求关闭或空闲超时"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 400, {'error': "请求头过长"}, keep_alive=False)
+                    break
+                try:
+                    method, target, version, headers = _parse_head(head)
+                except ValueError:
+                    await _respond(writer, 400, {'error': "无法解析的请求"}, keep_alive=False)
+                    break
+                length = int(headers.get('content-length', 0) or 0)
+                payload = await reader.readexactly(length) if length else b''
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                status, body = await self.dispatch(method, target, payload)
+                await _respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000, ready=None, follow=None, follow_interval=FOLLOW_INTERVAL):
+        """🚀 启动服务并一直运行；``ready`` 回调收到实际监听的 (host, port)（port=0 时由系统分配）
+
+        ``follow`` 为要跟踪的评分文件路径，新追加的行每 ``follow_interval`` 秒写入一次。
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        follower = asyncio.create_task(self.follow(follow, follow_interval)) if follow is not None else None
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[:2])
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                if follower is not None:
+                    follower.cancel()
+
+
+def _parse_head(head):
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ')
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    return method, target, version, headers
+
+
+async def _respond(writer, status, body, keep_alive):
+    payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode('latin-1') + payload)
+    await writer.drain()
+
+
+def _int(params, name, default=None):
+    value = params.get(name)
+    if value is None:
+        if default is None:
+            raise HttpError(400, f"缺少参数 {name}")
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HttpError(400, f"参数 {name} 应为整数: {value}") from None
+
+
+def _float(params, name, default):
+    try:
+        return float(params.get(name, default))
+    except ValueError:
+        raise HttpError(400, f"参数 {name} 应为数字: {params[name]}") from None
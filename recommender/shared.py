@@ -0,0 +1,177 @@
+"""🔒 跨会话共享的只读数据版本
+
+界面的所有会话与服务的所有线程读取同一份数据与索引，不做任何复制。共享的前提是谁都不能修改它：
+
+- :func:`freeze` 把数据与已构建索引中的 numpy / scipy 数组设为只读，之后按需构建的索引在发布前同样
+  设为只读；评分明细与电影统计表的数值列
+  （含类型的编码）改为建立在只读数组上（零复制），元数据字典换成只读映射。原地修改会抛出
+  ValueError / TypeError，而不是悄悄地影响其他会话。标题（Arrow 字符串，缓冲区本身不可变）与
+  日期列仍由 pandas 管理，按 Copy-on-Write 语义，修改派生出的 DataFrame 不会影响共享的表。
+- 新版本总是新建对象（:meth:`SharedEngine.reload`、:class:`~recommender.ingest.RatingIngestor`），
+  构建完成并冻结后才替换 ``engine`` 这一个引用；已发布的版本从不修改，正在使用旧版本的会话
+  不受影响，旧版本在最后一个使用者结束后被回收。
+"""
+import logging
+import threading
+import time
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from recommender.cache import ResultCache
+from recommender.data import DATA_DIR, data_sources, load_movie_data
+from recommender.engine import Engine
+from recommender.memory import MEMORY_BUDGET, log_usage
+from recommender.snapshot import file_signature
+
+logger = logging.getLogger(__name__)
+
+# 两次检查源文件是否变化的最小间隔（秒）
+CHECK_INTERVAL = 5.0
+
+
+def freeze(engine):
+    """🔒 把引擎的数据与已构建的索引设为只读，之后第一次用到时构建的索引也在发布前设为只读，返回引擎本身"""
+    data = engine.data
+    if data.ratings is not None:
+        data.ratings = _readonly_frame(data.ratings)
+    data.movies = _readonly_frame(data.movies)
+    data.metadata = MappingProxyType(data.metadata)
+    data.by_title = MappingProxyType(data.by_title)
+    engine.on_build = freeze_index
+    _freeze(engine, set())
+    return engine
+
+
+def freeze_index(index):
+    """🔒 把一个索引中的数组设为只读（:class:`~recommender.engine.Engine` 的 ``on_build``）"""
+    _freeze(index, set())
+
+
+def _readonly_frame(frame):
+    """数值列与类型编码建立在只读视图上的同一张表（不复制数据）"""
+    columns = {}
+    for name in frame.columns:
+        column = frame[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            columns[name] = pd.Categorical.from_codes(_readonly(column.cat.codes.to_numpy()), dtype=column.dtype)
+        elif column.dtype.kind in 'biuf':
+            columns[name] = _readonly(column.to_numpy())
+        else:
+            columns[name] = column.array
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+def _readonly(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def _freeze(value, seen):
+    """递归地把对象图中的数组设为只读；结果缓存本身是线程安全的可变结构，跳过"""
+    if id(value) in seen or isinstance(value, ResultCache):
+        return
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif sparse.issparse(value):
+        for array in (value.data, value.indices, value.indptr):
+            array.flags.writeable = False
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze(item, seen)
+    elif isinstance(value, (dict, MappingProxyType)):
+        for item in value.values():
+            _freeze(item, seen)
+    elif type(value).__module__.startswith('recommender.') and hasattr(value, '__dict__'):
+        for item in vars(value).values():
+            _freeze(item, seen)
+
+
+class SharedEngine:
+    """🔒 进程内共享的当前数据版本：``engine`` 为已冻结的 :class:`Engine`
+
+    读取方每次（一次界面重新运行、一个请求）取一次 :attr:`engine` 并在整个过程中使用它。启动时只构建
+    内存方案允许预先构建的索引（``plan.warm``），其余在第一次用到时构建并冻结。
+    :meth:`refresh` 发现源文件变化时调用 :meth:`reload` 构建新版本：构建在锁内进行，同时到达的
+    其他读取方不等待，继续使用当前版本。结果缓存在版本间沿用（键中含数据指纹）。
+    ``log`` 为内存账目与重新加载失败的输出函数，默认写入 :mod:`logging`。
+    """
+
+    def __init__(self, data_dir=DATA_DIR, budget=MEMORY_BUDGET, check_interval=CHECK_INTERVAL, log=None):
+        self.data_dir = data_dir
+        self.budget = budget
+        self.check_interval = check_interval
+        self.log = log
+        self.version = 0
+        self.cache = None
+        self.signatures = None
+        self.loaded_at = None
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+        self.engine = self._build()
+
+    def _signatures(self):
+        return {name: file_signature(path, with_hash=False) for name, path in data_sources(self.data_dir).items()}
+
+    def _build(self):
+        signatures = self._signatures()
+        data = load_movie_data(self.data_dir, budget=self.budget)
+        if self.cache is None and data.plan.cache_bytes:
+            self.cache = ResultCache(data.plan.cache_bytes)
+        engine = freeze(Engine(data, cache=self.cache)).warm()
+        log_usage(engine.memory_usage(), data.plan, log=self.log)
+        self.signatures = signatures
+        self.loaded_at = time.time()
+        return engine
+
+    @property
+    def fingerprint(self):
+        return self.engine.fingerprint
+
+    def stale(self):
+        """🔍 源文件的大小或修改时间是否与当前版本加载时不同"""
+        try:
+            return self._signatures() != self.signatures
+        except OSError:
+            return False
+
+    def reload(self, force=False, wait=True):
+        """🔄 源文件变化（或 ``force``）时构建并发布新版本，返回是否发布了新版本
+
+        ``wait`` 为 False 且另一个线程正在构建时立即返回 False。
+        """
+        if not self._lock.acquire(blocking=wait):
+            return False
+        try:
+            if not force and not self.stale():
+                return False
+            engine = self._build()
+            self.engine = engine
+            self.version += 1
+            return True
+        finally:
+            self._lock.release()
+
+    def refresh(self):
+        """⏲️ 距上次检查超过 ``check_interval`` 秒时检查源文件，变化则重新加载（不等待其他线程的构建）
+
+        重新加载失败（例如 CSV 正在写入）时继续使用当前版本，下次检查时重试。
+        """
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return False
+        self._checked = now
+        try:
+            return self.reload(wait=False)
+        except Exception as error:  # 新版本构建失败不影响正在服务的版本
+            (self.log or logger.warning)(f"⚠️ 重新加载数据失败，继续使用版本 {self.version}: "
+                                         f"{type(error).__name__}: {error}")
+            return False
+
+    def stats(self):
+        """📊 当前版本号、数据指纹与加载时间"""
+        return {'version': self.version, 'fingerprint': self.fingerprint, 'loaded_at': self.loaded_at}
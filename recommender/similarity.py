@@ -0,0 +1,255 @@
+"""📐 向量化皮尔逊相似度 - 中心化稀疏矩阵乘积
+
+评分矩阵只中心化一次，任意一批电影与全部电影的相关系数由三次稀疏矩阵乘积得到，
+结果与 ``DataFrame.corrwith`` 的成对完整观测语义一致。
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# 每批查询结果（6 个稠密统计量）占用的内存上限
+BLOCK_BYTES = 256 * 1024 * 1024
+# 方差项按相对量级视为零的阈值：float64 / float32 累加的统计量
+TOLERANCE = 1e-9
+FLOAT32_TOLERANCE = 1e-5
+
+
+class PearsonSimilarity:
+    """📐 电影间皮尔逊相关系数引擎
+
+    每个评分减去所属电影的平均分后保存为 CSR（用户×电影）和其转置（电影×用户），
+    对一批查询电影 Q 计算成对观测的充分统计量：
+
+    - ``n = Bq·B``、``Σx = Cq·B``、``Σx² = Cq²·B``
+    - ``Σy = Bq·C``、``Σxy = Cq·C``、``Σy² = Bq·C²``
+
+    其中 B 为评分掩码，C 为中心化评分。皮尔逊系数对平移不变，中心化只改善数值精度。
+
+    ``dtype`` 为这些矩阵的取值类型：float32 占用减半，乘积以 float32 累加，之后转为 float64
+    计算相关系数，与 float64 的结果相差约 1e-5（低内存模式使用，见 :mod:`recommender.memory`）。
+    """
+
+    def __init__(self, movie_matrix, dtype=np.float64):
+        self.items = movie_matrix.items
+        self.dtype = np.dtype(dtype)
+        csr = movie_matrix.csr
+        csc = movie_matrix.csc
+        self.means = np.bincount(csr.indices, weights=csr.data, minlength=movie_matrix.n_items)
+        self.means /= np.maximum(np.diff(csc.indptr), 1)
+
+        # 行方向（用户×电影）服务少量查询的稀疏乘积，列方向（电影×用户）服务大批量的稠密乘积；
+        # 各矩阵与评分矩阵共用下标数组，两个方向的掩码共用同一个全 1 数组，只有取值是新分配的
+        ones = np.ones(csr.nnz, dtype=self.dtype)
+        self.centered, self.squared = self._centered(csr.data, csr.indices, csr.indptr, csr.indices, csr.shape)
+        self.mask = sparse.csr_matrix((ones, csr.indices, csr.indptr), shape=csr.shape)
+        item_codes = np.repeat(np.arange(csc.shape[1]), np.diff(csc.indptr))
+        self.centered_t, self.squared_t = self._centered(csc.data, csc.indices, csc.indptr, item_codes,
+                                                         csc.shape[::-1])
+        self.mask_t = sparse.csr_matrix((ones, csc.indices, csc.indptr), shape=csc.shape[::-1])
+        self._targets = _Targets(self.mask, self.centered, self.squared,
+                                 self.mask_t, self.centered_t, self.squared_t)
+        self._shared = (csr.indices, csr.indptr, csc.indices, csc.indptr)
+
+    def _centered(self, data, indices, indptr, item_codes, shape):
+        """每个评分减去所属电影的平均分，返回 (中心化矩阵, 其逐元素平方)，两者结构相同"""
+        values = data.astype(np.float64) - self.means[item_codes]
+        squares = (values * values).astype(self.dtype)
+        return (sparse.csr_matrix((values.astype(self.dtype, copy=False), indices, indptr), shape=shape),
+                sparse.csr_matrix((squares, indices, indptr), shape=shape))
+
+    @property
+    def nbytes(self):
+        """💾 自身分配的字节数（与评分矩阵共用的下标数组不计入）"""
+        # 按数据起始地址去重：共用同一数组的矩阵只计一次
+        seen = {array.__array_interface__['data'][0] for array in self._shared}
+        total = self.means.nbytes
+        for matrix in (self.mask, self.centered, self.squared, self.mask_t, self.centered_t, self.squared_t):
+            for array in (matrix.data, matrix.indices, matrix.indptr):
+                address = array.__array_interface__['data'][0]
+                if address not in seen:
+                    seen.add(address)
+                    total += array.nbytes
+        return total
+
+    @property
+    def n_items(self):
+        return len(self.items)
+
+    def pearson(self, codes, columns=None):
+        """🔗 一批电影与所有电影（或 ``columns`` 指定的电影）的 (相关系数, 共同评分人数)
+
+        返回两个形状为 (len(codes), 目标电影数) 的数组。
+        """
+        targets = self._targets if columns is None else self._restrict(columns)
+        return self._pearson(codes, targets)
+
+    def _restrict(self, columns, transposed_only=False):
+        """只保留目标电影列的右操作数
+
+        ``transposed_only`` 时只按行切电影×用户方向，开销与这些列的评分数成正比，只能走稠密乘积。
+        """
+        columns = np.asarray(columns)
+        transposed = (self.mask_t[columns], self.centered_t[columns], self.squared_t[columns])
+        if transposed_only:
+            return _Targets(None, None, None, *transposed)
+        return _Targets(self.mask[:, columns], self.centered[:, columns], self.squared[:, columns],
+                        *transposed)
+
+    def _pearson(self, codes, targets):
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+        cent_q = self.centered_t[codes]
+        mask_q = self.mask_t[codes]
+        sq_q = self.squared_t[codes]
+        q = len(codes)
+
+        # 稀疏乘积只触及查询电影评分者的行，批量大时改用稠密左乘整张矩阵更快
+        if targets.mask is not None and 10 * targets.user_nnz[cent_q.indices].sum() < targets.mask.nnz * q:
+            left = sparse.vstack([mask_q, cent_q, sq_q], format='csr')
+            by_mask = (left @ targets.mask).toarray()
+            by_centered = (left[:2 * q] @ targets.centered).toarray()
+            syy = (mask_q @ targets.squared).toarray()
+        else:
+            left = sparse.vstack([mask_q, cent_q, sq_q], format='csr').toarray().T
+            by_mask = (targets.mask_t @ left).T
+            by_centered = (targets.centered_t @ left[:, :2 * q]).T
+            syy = (targets.squared_t @ left[:, :q]).T
+
+        if self.dtype != np.float64:
+            by_mask, by_centered, syy = by_mask.astype(np.float64), by_centered.astype(np.float64), \
+                syy.astype(np.float64)
+        n, sx, sxx = by_mask[:q], by_mask[q:2 * q], by_mask[2 * q:]
+        sy, sxy = by_centered[:q], by_centered[q:]
+        tolerance = FLOAT32_TOLERANCE if self.dtype == np.float32 else TOLERANCE
+        return pearson_from_sums(n, sx, sy, sxx, syy, sxy, tolerance), np.rint(n).astype(np.int32)
+
+    def pearson_subset(self, code, columns):
+        """🔗 一部电影与少量指定电影的 (相关系数, 共同评分人数)，开销只与这些电影的评分数有关"""
+        corr, support = self._pearson(code, self._restrict(columns, transposed_only=True))
+        return corr[0], support[0]
+
+    def aggregate(self, codes, weights, columns=None, block_bytes=BLOCK_BYTES):
+        """➕ 一组电影与目标电影相关系数的加权和，按内存上限分批计算、只限定一次目标列
+
+        返回三个长度为目标电影数的数组：``Σ wᵢ·ρᵢⱼ``、``Σ |ρᵢⱼ|`` 与有定义的相关系数个数，
+        无定义的相关系数按 0 计。
+        """
+        codes = np.atleast_1d(np.asarray(codes, dtype=np.int64))
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), codes.shape)
+        targets = self._targets if columns is None else self._restrict(columns)
+        n_targets = self.n_items if columns is None else len(columns)
+        weighted = np.zeros(n_targets)
+        norm = np.zeros(n_targets)
+        defined = np.zeros(n_targets, dtype=np.int32)
+        step = self.block_size(n_targets, block_bytes)
+        for start in range(0, len(codes), step):
+            corr, _ = self._pearson(codes[start:start + step], targets)
+            valid = ~np.isnan(corr)
+            corr[~valid] = 0.0
+            weighted += weights[start:start + step] @ corr
+            norm += np.abs(corr).sum(axis=0)
+            defined += valid.sum(axis=0, dtype=np.int32)
+        return weighted, norm, defined
+
+    def similar_items(self, key):
+        """🔎 某部电影与所有电影的相似度：DataFrame(correlation, support)，丢弃无定义项"""
+        corr, support = self.pearson(self.items.get_loc(key))
+        return pd.DataFrame(
+            {'correlation': corr[0], 'support': support[0]}, index=self.items
+        ).dropna()
+
+    def block_size(self, n_targets=None, block_bytes=BLOCK_BYTES):
+        """📏 满足内存上限的每批查询电影数"""
+        n_targets = self.n_items if n_targets is None else n_targets
+        return max(1, int(block_bytes // (6 * 8 * max(n_targets, 1))))
+
+    def top_k(self, k, eligible=None, codes=None, block_bytes=BLOCK_BYTES):
+        """🏆 分批计算所有电影（或 ``codes`` 指定的电影）的 top-K 近邻
+
+        逐批产出 ``(codes, neighbors, correlations, supports)``，近邻只从 ``eligible`` 为真的
+        电影中选取（只对这些列做乘积），不足 K 个时以 -1 / NaN / 0 填充。
+        """
+        columns = np.arange(self.n_items) if eligible is None else np.flatnonzero(eligible)
+        targets = self._restrict(columns)
+        step = self.block_size(len(columns), block_bytes)
+        queries = np.arange(self.n_items) if codes is None else np.asarray(codes, dtype=np.int64)
+        for start in range(0, len(queries), step):
+            codes = queries[start:start + step]
+            corr, support = self._pearson(codes, targets)
+            # 排除电影自身
+            rows, cols = np.nonzero(codes[:, None] == columns[None, :])
+            corr[rows, cols] = np.nan
+            neighbors, correlations, supports = select_top_k(corr, support, k)
+            yield codes, np.where(neighbors >= 0, columns[neighbors], -1), correlations, supports
+
+
+class _Targets:
+    """目标电影列对应的右操作数（两种方向）"""
+
+    def __init__(self, mask, centered, squared, mask_t, centered_t, squared_t):
+        self.mask = mask
+        self.centered = centered
+        self.squared = squared
+        self.mask_t = mask_t
+        self.centered_t = centered_t
+        self.squared_t = squared_t
+        self.user_nnz = None if mask is None else np.diff(mask.indptr)
+
+
+def select_top_k(corr, support, k):
+    """🏆 每行取相关系数最高的 K 列，NaN 不参与排序"""
+    rows, n_cols = corr.shape
+    k_eff = min(k, n_cols)
+    neighbors = np.full((rows, k), -1, dtype=np.int32)
+    correlations = np.full((rows, k), np.nan, dtype=np.float32)
+    supports = np.zeros((rows, k), dtype=np.int32)
+    if k_eff == 0:
+        return neighbors, correlations, supports
+
+    scores = np.where(np.isnan(corr), -np.inf, corr)
+    top = np.argpartition(-scores, k_eff - 1, axis=1)[:, :k_eff]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    valid = np.isfinite(top_scores)
+
+    neighbors[:, :k_eff] = np.where(valid, top, -1)
+    correlations[:, :k_eff] = np.where(valid, top_scores, np.nan)
+    supports[:, :k_eff] = np.where(valid, np.take_along_axis(support, top, axis=1), 0)
+    return neighbors, correlations, supports
+
+
+def pearson_from_sums(n, sx, sy, sxx, syy, sxy, tolerance=TOLERANCE):
+    """📐 由成对观测的充分统计量计算皮尔逊相关系数，无定义处返回 NaN
+
+    ``tolerance`` 为把方差项视为零的相对量级，应与统计量累加时的浮点精度相称。
+    """
+    # 批量计算时数组很大，尽量原地运算以减少临时数组
+    cov = n * sxy
+    cov -= sx * sy
+    var_x = _variance_term(n, sx, sxx, tolerance)
+    var_x *= _variance_term(n, sy, syy, tolerance)
+    undefined = (var_x == 0) | (n < 2)
+    np.sqrt(var_x, out=var_x)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov /= var_x
+    cov[undefined] = np.nan
+    return np.clip(cov, -1.0, 1.0, out=cov)
+
+
+def _variance_term(n, s, ss, tolerance=TOLERANCE):
+    """n·Σx² - (Σx)²；浮点抵消误差可能让零方差变成极小的正数，按量级视为零"""
+    scaled = n * ss
+    term = scaled - s * s
+    term[term <= tolerance * np.maximum(scaled, 1.0)] = 0.0
+    return term
+
+
+def corrwith_reference(movie_matrix, key):
+    """🐢 pandas ``corrwith`` 参考实现：只展开评价过该电影的用户行，用于核对向量化结果"""
+    rows, _ = movie_matrix.column(key)
+    frame = movie_matrix.to_frame(rows)
+    target = frame[key]
+    return pd.DataFrame({
+        'correlation': frame.corrwith(target),
+        'support': frame.notna().mul(target.notna(), axis=0).sum(),
+    }).dropna()
@@ -0,0 +1,140 @@
+"""💾 二进制列式快照
+
+把解析好的数据表和派生结构按列保存为 ``.npy`` 文件，之后启动时以内存映射方式读取，
+跳过 CSV 解析与合并。快照记录源文件的大小、修改时间与 SHA-1：大小和修改时间不变时直接
+复用；修改时间变了但内容哈希相同（例如文件被 touch）也会复用，否则视为过期。
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+# 快照布局版本，列（或记录的数据指纹）的含义或类型变化时递增
+SNAPSHOT_VERSION = 5
+MANIFEST = 'manifest.json'
+
+
+def file_signature(path, with_hash=True):
+    """🔏 源文件的大小、修改时间与（可选）SHA-1"""
+    stat = os.stat(path)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        signature['sha1'] = digest.hexdigest()
+    return signature
+
+
+def save(directory, columns, sources, meta=None):
+    """💾 写入快照
+
+    ``columns`` 的值为 numpy 数组或字符串列表（按 UTF-8 拼接存储）；``sources`` 为
+    名称 → 源文件路径。先写入临时目录再整体替换，读者不会看到写了一半的快照。
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = os.path.join(parent, f".{os.path.basename(directory)}.{uuid.uuid4().hex}")
+    os.makedirs(staging)
+    try:
+        arrays, strings = [], []
+        for name, values in columns.items():
+            if isinstance(values, np.ndarray) and values.dtype != object:
+                np.save(os.path.join(staging, f'{name}.npy'), values)
+                arrays.append(name)
+            else:
+                blob, offsets = _encode_strings(values)
+                np.save(os.path.join(staging, f'{name}.utf8.npy'), blob)
+                np.save(os.path.join(staging, f'{name}.offsets.npy'), offsets)
+                strings.append(name)
+
+        manifest = {
+            'version': SNAPSHOT_VERSION,
+            'sources': {name: file_signature(path) for name, path in sources.items()},
+            'arrays': arrays,
+            'strings': strings,
+            'meta': meta or {},
+        }
+        with open(os.path.join(staging, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        retired = None
+        if os.path.exists(directory):
+            retired = staging + '.old'
+            os.replace(directory, retired)
+        os.replace(staging, directory)
+        if retired:
+            shutil.rmtree(retired, ignore_errors=True)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load(directory, sources, mmap=True):
+    """📂 读取快照，数组以只读内存映射打开
+
+    返回 ``(columns, meta)``；快照不存在、版本不符或源文件已变化时返回 ``None``。
+    """
+    manifest_path = os.path.join(directory, MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != SNAPSHOT_VERSION or not _sources_match(manifest, sources):
+        return None
+
+    mode = 'r' if mmap else None
+    try:
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode)
+                   for name in manifest['arrays']}
+        for name in manifest['strings']:
+            blob = np.load(os.path.join(directory, f'{name}.utf8.npy'))
+            offsets = np.load(os.path.join(directory, f'{name}.offsets.npy'))
+            columns[name] = _decode_strings(blob, offsets)
+    except (OSError, ValueError):
+        return None
+
+    # 源文件只是被 touch 过：刷新清单里的修改时间，下次免去哈希
+    if manifest.pop('_touched', False):
+        try:
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+        except OSError:
+            pass
+    return columns, manifest['meta']
+
+
+def _sources_match(manifest, sources):
+    recorded = manifest.get('sources', {})
+    if set(recorded) != set(sources):
+        return False
+    for name, path in sources.items():
+        try:
+            current = file_signature(path, with_hash=False)
+        except OSError:
+            return False
+        expected = recorded[name]
+        if current['size'] != expected['size']:
+            return False
+        if current['mtime_ns'] != expected['mtime_ns']:
+            if file_signature(path)['sha1'] != expected['sha1']:
+                return False
+            expected['mtime_ns'] = current['mtime_ns']
+            manifest['_touched'] = True
+    return True
+
+
+def _encode_strings(values):
+    encoded = [str(value).encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _decode_strings(blob, offsets):
+    data = blob.tobytes()
+    return [data[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
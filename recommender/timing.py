@@ -0,0 +1,284 @@
+"""⏱️ 命名计时段 - 一次界面重新运行 / 一次引擎调用的耗时分解
+
+``with TIMER.span('search'):`` 或 ``@TIMER.timed()`` 标记一段代码。计时关闭时 ``span`` 返回共享的
+空上下文、``timed`` 的包装函数只多一次判断，几乎没有开销。计时在两种情况下开启：
+
+- 进程级：``TIMER.enabled``（环境变量 ``RECOMMENDER_TIMING=1`` 或设置了 ``RECOMMENDER_METRICS``），
+  每段耗时计入按名称的滑动窗口直方图，可导出为 JSON Lines 或 Prometheus 文本格式
+- 单次运行：当前线程上有活动的 :class:`Trace`（界面打开性能面板时），本次运行的各段耗时
+  逐条记下供面板展示，同时也计入直方图
+
+界面脚本是一段自上而下的代码，各部分用 :meth:`Trace.mark` 分段（自上一次 mark 以来的耗时），
+引擎函数与图表构建用 span 嵌套在其中。
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# 延迟直方图的桶上限（毫秒），最后一个桶收纳更慢的请求
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+# 计时段的桶上限（毫秒）：从亚毫秒的查表到秒级的数据加载
+SPAN_BUCKETS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+# 滑动窗口的长度与分片数（秒）：每个分片一个直方图，过期的分片整体丢弃
+WINDOW_SECONDS = 300
+WINDOW_SLOTS = 5
+# 两次导出的最小间隔（秒）
+EXPORT_INTERVAL = 10.0
+METRIC_NAME = 'recommender_span_duration_ms'
+
+
+class LatencyHistogram:
+    """📊 固定分桶的延迟直方图，``counts[i]`` 为不超过 ``buckets[i]`` 毫秒（且超过前一个桶）的请求数"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def merge(self, other):
+        """➕ 累加另一个同分桶的直方图，返回自身"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum_ms += other.sum_ms
+        return self
+
+    def quantile(self, q):
+        """按桶上限估计的分位数（毫秒），落在最后一个桶时返回 None"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def to_dict(self):
+        return {
+            'count': self.total,
+            'mean_ms': self.sum_ms / self.total if self.total else None,
+            'p50_ms': self.quantile(0.5),
+            'p95_ms': self.quantile(0.95),
+            'p99_ms': self.quantile(0.99),
+            'buckets': {**{f'le_{bound}': count for bound, count in zip(self.buckets, self.counts)},
+                        'inf': self.counts[-1]},
+        }
+
+
+class RollingHistogram:
+    """🪟 最近 ``window`` 秒的直方图（按 ``slots`` 个分片滚动），另记启动以来的累计次数与总耗时"""
+
+    def __init__(self, buckets=SPAN_BUCKETS_MS, window=WINDOW_SECONDS, slots=WINDOW_SLOTS):
+        self.buckets = tuple(buckets)
+        self.slot_seconds = window / slots
+        self.slots = deque(maxlen=slots)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms, now=None):
+        slot = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        if not self.slots or self.slots[-1][0] != slot:
+            self.slots.append((slot, LatencyHistogram(self.buckets)))
+        self.slots[-1][1].observe(ms)
+        self.total += 1
+        self.sum_ms += ms
+
+    def window(self, now=None):
+        """窗口内各分片合并成的直方图"""
+        oldest = int((time.monotonic() if now is None else now) // self.slot_seconds) - self.slots.maxlen + 1
+        merged = LatencyHistogram(self.buckets)
+        for slot, histogram in list(self.slots):
+            if slot >= oldest:
+                merged.merge(histogram)
+        return merged
+
+
+class Trace:
+    """🧾 一次运行的耗时分解：``sections`` 为 mark 分出的 (名称, 毫秒)，``spans`` 为 (名称, 毫秒, 嵌套深度)
+
+    ``active`` 为 False 时（计时关闭）mark / finish 什么也不做。
+    """
+
+    def __init__(self, timer, active):
+        self.timer = timer
+        self.active = active
+        self.sections = []
+        self.spans = []
+        self.total_ms = None
+        self.started = self._last = time.perf_counter()
+
+    def mark(self, name):
+        """🏁 以 ``name`` 结束自上一次 mark（或开始）以来的一段"""
+        if not self.active:
+            return
+        now = time.perf_counter()
+        ms = (now - self._last) * 1000
+        self._last = now
+        self.sections.append((name, ms))
+        self.timer.observe(name, ms)
+
+    def finish(self, name='rerun'):
+        """✅ 结束本次运行：总耗时以 ``name`` 计入直方图，当前线程不再记录到本对象"""
+        if not self.active:
+            return
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        self.timer.observe(name, self.total_ms)
+        if getattr(self.timer._local, 'trace', None) is self:
+            self.timer._local.trace = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('timer', 'name', 'started')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        local = self.timer._local
+        local.depth = getattr(local, 'depth', 0) + 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.started) * 1000
+        local = self.timer._local
+        local.depth -= 1
+        trace = getattr(local, 'trace', None)
+        if trace is not None:
+            trace.spans.append((self.name, ms, local.depth))
+        self.timer.observe(self.name, ms)
+        return False
+
+
+class Timer:
+    """⏱️ 计时段的入口与按名称的滑动窗口直方图（线程安全，进程内共享一个 :data:`TIMER`）"""
+
+    def __init__(self, enabled=False, buckets=SPAN_BUCKETS_MS, window=WINDOW_SECONDS, slots=WINDOW_SLOTS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.window_seconds = window
+        self.slots = slots
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._exported = {}
+
+    def trace(self, active=False):
+        """🧾 为当前线程开始一次运行的耗时分解；``active`` 或进程级计时开启时才记录"""
+        trace = Trace(self, active or self.enabled)
+        self._local.trace = trace if trace.active else None
+        self._local.depth = 0
+        return trace
+
+    def span(self, name):
+        """⏱️ 计时一段代码的上下文管理器，计时关闭时为空操作"""
+        if not self.enabled and getattr(self._local, 'trace', None) is None:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name=None):
+        """⏱️ 计时整个函数的装饰器，默认名称为 ``模块.函数名``"""
+        def decorate(func):
+            label = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled and getattr(self._local, 'trace', None) is None:
+                    return func(*args, **kwargs)
+                with _Span(self, label):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def observe(self, name, ms):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram(self.buckets, self.window_seconds, self.slots)
+            histogram.observe(ms)
+
+    def snapshot(self):
+        """📊 每个计时段窗口内的统计（次数、平均值、分位数、分桶）与启动以来的累计次数 / 总耗时"""
+        with self._lock:
+            return {name: dict(histogram.window().to_dict(), total_count=histogram.total,
+                               total_ms=histogram.sum_ms)
+                    for name, histogram in sorted(self.histograms.items())}
+
+    def jsonl(self):
+        """📄 每个计时段一行 JSON，附带时间戳与窗口长度"""
+        now = time.time()
+        return ''.join(json.dumps({'ts': round(now, 3), 'span': name, 'window_s': self.window_seconds, **stats},
+                                  ensure_ascii=False) + '\n'
+                       for name, stats in self.snapshot().items())
+
+    def prometheus(self):
+        """📄 Prometheus 文本格式：窗口内的分位数（summary）与累计的 _sum / _count"""
+        lines = [f'# HELP {METRIC_NAME} Duration of named timing spans over the last {self.window_seconds}s.',
+                 f'# TYPE {METRIC_NAME} summary']
+        for name, stats in self.snapshot().items():
+            label = _label(name)
+            for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                value = stats[key]
+                lines.append(f'{METRIC_NAME}{{span="{label}",quantile="{quantile}"}} '
+                             f'{"+Inf" if value is None else value}')
+            lines.append(f'{METRIC_NAME}_sum{{span="{label}"}} {stats["total_ms"]:.3f}')
+            lines.append(f'{METRIC_NAME}_count{{span="{label}"}} {stats["total_count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path, min_interval=EXPORT_INTERVAL):
+        """💾 导出到本地文件供采集程序读取，距上次导出不足 ``min_interval`` 秒时跳过，返回是否导出
+
+        ``.jsonl`` 追加一批记录（每个计时段一行）；其余扩展名（如 ``.prom``）写 Prometheus 文本，
+        先写临时文件再原子替换，读取方不会读到半个文件。
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._exported.get(path, -min_interval) < min_interval:
+                return False
+            self._exported[path] = now
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if path.endswith('.jsonl'):
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(self.jsonl())
+        else:
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus())
+            os.replace(tmp_path, path)
+        return True
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 导出文件路径；设置后自动开启进程级计时
+METRICS_PATH = os.environ.get('RECOMMENDER_METRICS') or None
+TIMER = Timer(enabled=bool(METRICS_PATH) or os.environ.get('RECOMMENDER_TIMING', '') not in ('', '0'))
+span = TIMER.span
+timed = TIMER.timed
@@ -0,0 +1,87 @@
+"""👥 基于用户的协同过滤 - 稀疏评分矩阵上的 top-K 相似用户
+
+每位用户的评分减去其平均分并按行归一化，两位用户的相似度即归一化向量的点积（中心化余弦，
+只在共同评分的电影上累加）。查询用户的行向量乘以电影×用户方向的矩阵，稀疏乘积只触及
+查询用户评过的电影的评分者，一次得到与所有用户的相似度；再用 argpartition 取 top-K，
+把这些邻居的中心化评分按相似度加权汇总为预测评分。
+"""
+import numpy as np
+from scipy import sparse
+
+# 预测评分至少要有这么多位邻居评过该电影
+MIN_SUPPORT = 2
+
+
+class UserKNN:
+    """👥 相似用户检索与评分预测
+
+    ``centered`` 为用户×电影的中心化评分（CSR，与评分矩阵共用下标数组，用于汇总邻居评分），
+    ``normalized_t`` 为按用户归一化后的电影×用户矩阵（CSR，用于一次求出查询用户与所有用户的相似度）。
+    """
+
+    def __init__(self, movie_matrix):
+        csr = movie_matrix.csr
+        counts = np.diff(csr.indptr)
+        rows = np.repeat(np.arange(csr.shape[0]), counts)
+        self.means = (np.bincount(rows, weights=csr.data, minlength=csr.shape[0])
+                      / np.maximum(counts, 1)).astype(np.float32)
+
+        centered = (csr.data - self.means[rows]).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=centered.astype(np.float64) ** 2, minlength=csr.shape[0]))
+        # 评分全部相同的用户（范数为 0）与任何人的相似度都是 0
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.inverse_norms = inverse.astype(np.float32)
+        self.centered = sparse.csr_matrix((centered, csr.indices, csr.indptr), shape=csr.shape)
+        normalized = sparse.csr_matrix((centered * self.inverse_norms[rows], csr.indices, csr.indptr),
+                                       shape=csr.shape)
+        self.normalized_t = normalized.T.tocsr()
+
+    @property
+    def nbytes(self):
+        t = self.normalized_t
+        return (self.means.nbytes + self.inverse_norms.nbytes + self.centered.data.nbytes
+                + t.data.nbytes + t.indices.nbytes + t.indptr.nbytes)
+
+    def similarities(self, user_code):
+        """🔗 某位用户与所有用户的中心化余弦相似度（长度为用户数的稠密数组，自身为 0）"""
+        query = self.centered[user_code] * self.inverse_norms[user_code]
+        sims = (query @ self.normalized_t).toarray().ravel()
+        sims[user_code] = 0.0
+        return sims
+
+    def neighbors(self, user_code, k=50):
+        """👥 相似度最高的 K 位用户（只取相似度为正的）：返回 (用户编码, 相似度)，按相似度降序"""
+        sims = self.similarities(user_code)
+        k = min(k, len(sims) - 1)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind='stable')]
+        top = top[sims[top] > 0]
+        return top, sims[top]
+
+    def predict(self, user_code, k=50, min_support=MIN_SUPPORT):
+        """🔮 用 top-K 邻居预测该用户对每部电影的评分
+
+        预测评分 = 用户平均分 + Σ sim·(r - 邻居平均分) / Σ |sim|，只对至少 ``min_support`` 位
+        邻居评过的电影有定义。返回三个长度为电影数的数组：预测评分（无定义为 NaN）、
+        参与预测的邻居数、该用户是否已评过。
+        """
+        codes, sims = self.neighbors(user_code, k)
+        n_items = self.centered.shape[1]
+        indptr = self.centered.indptr
+        seen = np.zeros(n_items, dtype=bool)
+        seen[self.centered.indices[indptr[user_code]:indptr[user_code + 1]]] = True
+        if len(codes) == 0:
+            return np.full(n_items, np.nan), np.zeros(n_items, dtype=np.int32), seen
+
+        block = self.centered[codes]
+        rated = sparse.csr_matrix((np.ones(block.nnz, dtype=np.float32), block.indices, block.indptr),
+                                  shape=block.shape)
+        weighted = block.T @ sims
+        norm = rated.T @ np.abs(sims)
+        support = np.bincount(block.indices, minlength=n_items).astype(np.int32)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            predicted = self.means[user_code] + weighted / norm
+        predicted = np.where(support >= min_support, np.clip(predicted, 0.5, 5.0), np.nan)
+        return predicted, support, seen
@@ -0,0 +1,103 @@
+"""👤 用户索引 - 按用户取评分与预计算的用户画像
+
+评分矩阵的 CSR 布局本身就是按用户排序的评分加偏移量：第 ``u`` 位用户的评分是
+``indices/data[indptr[u]:indptr[u + 1]]``。本模块在其上预计算每位用户的评分数、平均分与
+类型直方图，查询某位用户只需一次二分查找和切片。
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class UserIndex:
+    """👤 用户主序的评分索引与每位用户的聚合统计
+
+    ``genre_counts`` 为 (用户数, 类型数) 的 int32 数组，第 (u, g) 项是用户 u 评过的含类型 g 的电影数。
+    """
+
+    def __init__(self, movie_matrix, genre_index):
+        csr = movie_matrix.csr
+        self.movie_matrix = movie_matrix
+        self.user_ids = movie_matrix.user_ids
+        self.genres = genre_index.genres
+        self.counts = np.diff(csr.indptr).astype(np.int32)
+        rows = np.repeat(np.arange(len(self.counts)), self.counts)
+        sums = np.bincount(rows, weights=csr.data, minlength=len(self.counts))
+        self.means = (sums / np.maximum(self.counts, 1)).astype(np.float32)
+
+        rated = sparse.csr_matrix((np.ones(csr.nnz, dtype=np.float32), csr.indices, csr.indptr),
+                                  shape=csr.shape)
+        self.genre_counts = np.asarray(rated @ _membership(genre_index)).astype(np.int32)
+
+    def updated(self, movie_matrix, genre_index, inserted, changed):
+        """🔁 评分变化后的索引（不修改当前索引）：只重算 ``changed``（新行编码）这些用户的统计量
+
+        ``inserted`` 为新用户在旧用户数组中的插入位置（同 :meth:`RatingMatrix.with_cells`）。
+        """
+        csr = movie_matrix.csr
+        changed = np.asarray(changed, dtype=np.int64)
+        index = copy.copy(self)
+        index.movie_matrix = movie_matrix
+        index.user_ids = movie_matrix.user_ids
+        index.counts = np.diff(csr.indptr).astype(np.int32)
+        index.means = np.insert(self.means, inserted, 0)
+        index.genre_counts = np.insert(self.genre_counts, inserted, 0, axis=0)
+        for code in changed.tolist():
+            index.means[code] = csr.data[csr.indptr[code]:csr.indptr[code + 1]].mean(dtype=np.float64)
+
+        block = csr[changed]
+        rated = sparse.csr_matrix((np.ones(block.nnz, dtype=np.float32), block.indices, block.indptr),
+                                  shape=block.shape)
+        index.genre_counts[changed] = np.asarray(rated @ _membership(genre_index)).astype(np.int32)
+        return index
+
+    @property
+    def n_users(self):
+        return len(self.user_ids)
+
+    @property
+    def max_user_id(self):
+        return int(self.user_ids[-1]) if len(self.user_ids) else 0
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.means.nbytes + self.genre_counts.nbytes
+
+    def __contains__(self, user_id):
+        try:
+            self.movie_matrix.user_code(user_id)
+        except KeyError:
+            return False
+        return True
+
+    def ratings(self, user_id):
+        """📋 某位用户的评分：DataFrame(movieId, rating)，按 movieId 升序；用户不存在时抛出 KeyError"""
+        code = self.movie_matrix.user_code(user_id)
+        csr = self.movie_matrix.csr
+        start, end = csr.indptr[code], csr.indptr[code + 1]
+        return pd.DataFrame({
+            'movieId': self.movie_matrix.items.to_numpy()[csr.indices[start:end]],
+            'rating': csr.data[start:end],
+        })
+
+    def profile(self, user_id, top_genres=5):
+        """📊 用户画像：评分数、平均分与评过最多的类型；用户不存在时返回 None"""
+        try:
+            code = self.movie_matrix.user_code(user_id)
+        except KeyError:
+            return None
+        genres = pd.Series(self.genre_counts[code], index=self.genres, name='count')
+        genres = genres[genres > 0].sort_values(ascending=False, kind='stable')
+        return {
+            'total_movies': int(self.counts[code]),
+            'avg_rating': round(float(self.means[code]), 2),
+            'favorite_genres': genres.head(top_genres),
+        }
+
+
+def _membership(genre_index):
+    """(电影数, 类型数) 的 0/1 矩阵，列顺序同 ``genre_index.genres``"""
+    bits = np.array([genre_index.bits[name] for name in genre_index.genres], dtype=np.uint64)
+    return ((genre_index.masks[:, None] & bits[None, :]) != 0).astype(np.float32)
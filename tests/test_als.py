@@ -0,0 +1,51 @@
+"""🧮 ALS 的分批：每批的估计内存（含正规方程左侧的 f × f 矩阵）不超过上限"""
+import numpy as np
+import pytest
+
+from recommender.als import _batches
+
+MB = 1024 ** 2
+
+
+def batch_bytes(counts, rows, factors):
+    """按 solve_batch 实际分配的数组计算一批的字节数：补零的因子块及临时数组 + 正规方程左侧"""
+    length = max(int(counts[rows].max()), 1)
+    return len(rows) * (2 * length * factors + factors * factors) * 8
+
+
+def long_tail(n, seed=0):
+    """多数行只有几条评分、少数行很长（MovieLens 的电影评分数分布）"""
+    return np.minimum(np.random.default_rng(seed).zipf(1.6, n), 100_000).astype(np.int32)
+
+
+@pytest.mark.parametrize('factors', [16, 64, 256])
+def test_batches_stay_under_limit(factors):
+    counts = long_tail(50_000)
+    limit = 64 * MB
+    batches = _batches(counts, factors, limit)
+    for rows in batches:
+        assert len(rows) == 1 or batch_bytes(counts, rows, factors) <= limit
+
+
+def test_lhs_bounds_batches_of_short_rows():
+    # 全是单条评分的行：因子块很小，批大小由 f × f 的左侧矩阵决定
+    counts = np.ones(100_000, dtype=np.int32)
+    batches = _batches(counts, 64, 64 * MB)
+    assert max(len(rows) for rows in batches) * 64 * 64 * 8 <= 64 * MB
+    assert len(batches) > 1
+
+
+def test_batches_cover_every_row_once_in_length_order():
+    counts = long_tail(10_000, seed=1)
+    counts[:100] = 0                                              # 没有评分的行也要解（结果为 0 向量）
+    batches = _batches(counts, 32, MB)
+    rows = np.concatenate(batches)
+    assert np.array_equal(np.sort(rows), np.arange(len(counts)))
+    assert np.all(np.diff(counts[rows]) >= 0)
+
+
+def test_long_rows_do_not_overflow_int32():
+    # 行长 × 因子数 × 8 超出 int32 时仍按真实大小切批：每批只放得下一行
+    counts = np.array([3_000_000, 3_000_000, 3_000_000], dtype=np.int32)
+    batches = _batches(counts, 256, 64 * MB)
+    assert [len(rows) for rows in batches] == [1, 1, 1]
@@ -0,0 +1,163 @@
+"""📥 增量评分写入：结果与在合并后的 CSV 上完整重建一致，以及跟踪只追加的评分文件"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender.data import load_movie_data
+from recommender.engine import Engine
+from recommender.ingest import RatingIngestor
+from recommender.neighbors import NeighborIndex
+
+N_USERS = 40
+N_MOVIES = 12
+K = 5
+MIN_RATINGS = 5
+GENRES = ('Comedy', 'Drama|Romance', 'Action|Sci-Fi', 'Comedy|Drama', 'Horror')
+
+
+def write_dataset(directory, seed=3):
+    """稀疏的小数据集：每位用户随机评了约一半的电影，电影的评分数各不相同"""
+    rng = np.random.default_rng(seed)
+    users, movies = np.meshgrid(np.arange(1, N_USERS + 1), np.arange(1, N_MOVIES + 1), indexing='ij')
+    rated = rng.random(users.shape) < np.linspace(0.2, 0.9, N_MOVIES)
+    ratings = pd.DataFrame({
+        'userId': users[rated],
+        'movieId': movies[rated],
+        'rating': rng.integers(1, 11, int(rated.sum())) / 2,
+        'timestamp': 964982703 + np.arange(int(rated.sum())),
+    })
+    ratings.to_csv(directory / 'ratings.csv', index=False)
+    pd.DataFrame({
+        'movieId': np.arange(1, N_MOVIES + 1),
+        'title': [f"Movie {i} ({1990 + i})" for i in range(1, N_MOVIES + 1)],
+        'genres': [GENRES[i % len(GENRES)] for i in range(N_MOVIES)],
+    }).to_csv(directory / 'movies.csv', index=False)
+    return ratings
+
+
+@pytest.fixture
+def ingestor(tmp_path):
+    write_dataset(tmp_path)
+    return RatingIngestor(Engine(load_movie_data(str(tmp_path), use_snapshot=False)))
+
+
+def build_engine(data):
+    index = NeighborIndex.build(data.movie_matrix, data.movies['ratings_count'], k=K, min_ratings=MIN_RATINGS)
+    return Engine(data, neighbor_index=index)
+
+
+@pytest.fixture
+def ingested(tmp_path):
+    """写入一批评分：已有用户的新单元格、重复评分已有单元格、批内重复、新用户与未知电影，
+    返回 (增量写入后的引擎, 报告, 在合并后的 CSV 上完整重建的数据)"""
+    ratings = write_dataset(tmp_path)
+    ingestor = RatingIngestor(build_engine(load_movie_data(str(tmp_path), use_snapshot=False)))
+    first = ratings.iloc[0]
+    unrated = next(movie for movie in range(1, N_MOVIES + 1)
+                   if not ((ratings['userId'] == 1) & (ratings['movieId'] == movie)).any())
+    events = pd.DataFrame([
+        (1, unrated, 4.5, 1700000000),                            # 已有用户、新单元格
+        (int(first.userId), int(first.movieId), 1.0, 1700000001),  # 重新评分已有单元格
+        (int(first.userId), int(first.movieId), 2.0, 1700000002),  # 同一单元格在批内重复
+        (N_USERS + 5, 2, 5.0, 1700000003),                        # 新用户（插入到行末）
+        (N_USERS + 5, 7, 3.5, 1700000004),
+        (N_USERS + 2, 3, 0.5, 1700000005),                        # 另一位新用户
+        (3, 999, 4.0, 1700000006),                                # 未知电影：跳过
+        (3, 4, 7.0, 1700000007),                                  # 评分越界：无效
+    ], columns=['userId', 'movieId', 'rating', 'timestamp'])
+    report = ingestor.ingest(events)
+
+    combined = tmp_path / 'combined'
+    combined.mkdir()
+    accepted = events[events['movieId'].le(N_MOVIES) & events['rating'].le(5.0)]
+    pd.concat([ratings, accepted], ignore_index=True).to_csv(combined / 'ratings.csv', index=False)
+    (combined / 'movies.csv').write_bytes((tmp_path / 'movies.csv').read_bytes())
+    return ingestor.engine, report, load_movie_data(str(combined), use_snapshot=False)
+
+
+def test_report(ingested):
+    _, report, _ = ingested
+    assert report['accepted'] == 6 and report['invalid'] == 1 and report['unknown_movies'] == 1
+    assert report['new_users'] == 2 and report['version'] == 1
+
+
+def test_matrix_matches_rebuild(ingested):
+    engine, _, rebuilt = ingested
+    matrix, expected = engine.data.movie_matrix, rebuilt.movie_matrix
+    assert np.array_equal(matrix.user_ids, expected.user_ids)
+    assert matrix.items.equals(expected.items)
+    for layout in ('csr', 'csc'):
+        actual, wanted = getattr(matrix, layout), getattr(expected, layout)
+        assert np.array_equal(actual.indptr, wanted.indptr)
+        assert np.array_equal(actual.indices, wanted.indices)
+        np.testing.assert_allclose(actual.data, wanted.data, rtol=1e-6)
+    assert matrix.fingerprint == expected.fingerprint
+    assert engine.data.n_ratings == rebuilt.n_ratings
+
+
+def test_movie_stats_match_rebuild(ingested):
+    engine, _, rebuilt = ingested
+    columns = ['ratings_count', 'avg_rating', 'rating_var', 'bayes_rating', 'first_rated', 'last_rated']
+    pd.testing.assert_frame_equal(engine.data.movies[columns], rebuilt.movies[columns],
+                                  check_dtype=False, rtol=1e-6)
+    for movie_id in rebuilt.movies.index:
+        info, expected = engine.data.metadata[movie_id], rebuilt.metadata[movie_id]
+        assert info._replace(avg_rating=expected.avg_rating) == expected
+        assert info.avg_rating == pytest.approx(expected.avg_rating)
+
+
+def test_user_stats_match_rebuild(ingested):
+    engine, _, rebuilt = ingested
+    users, expected = engine.data.users, rebuilt.users
+    assert np.array_equal(users.user_ids, expected.user_ids)
+    assert np.array_equal(users.counts, expected.counts)
+    np.testing.assert_allclose(users.means, expected.means, rtol=1e-6)
+    assert np.array_equal(users.genre_counts, expected.genre_counts)
+
+
+def test_neighbor_index_matches_rebuild(ingested):
+    engine, _, rebuilt = ingested
+    index, expected = engine.neighbor_index, build_engine(rebuilt).neighbor_index
+    assert index.fingerprint == expected.fingerprint and (expected.neighbors >= 0).any()
+    np.testing.assert_allclose(index.correlations, expected.correlations, atol=1e-9)
+    np.testing.assert_array_equal(index.neighbors == -1, expected.neighbors == -1)
+
+
+def append(path, *lines):
+    with open(path, 'a') as f:
+        f.write(''.join(line + '\n' for line in lines))
+
+
+def test_follow_skips_malformed_line_and_keeps_the_rest(ingestor, tmp_path):
+    path = tmp_path / 'incoming.csv'
+    append(path, 'userId,movieId,rating,timestamp', '1,1,4.0,1700000000')
+    assert ingestor.ingest_file(path) is None                     # 已有的行视为已加载
+    ratings = ingestor.engine.data.n_ratings
+
+    append(path, '2,3,4.5,1700000001', '3,4,5.0,1700000002,extra,fields', '4,5,3.0,1700000003',
+           '5,6,2.5,1700000004')
+    report = ingestor.ingest_file(path)
+    assert report['accepted'] == 3 and report['invalid'] == 1
+    assert ingestor.engine.data.n_ratings == ratings + 3
+
+    append(path, '6,7,4.0,1700000005')
+    report = ingestor.ingest_file(path)
+    assert report['accepted'] == 1 and report['invalid'] == 0
+
+
+def test_follow_rereads_lines_after_failed_ingest(ingestor, tmp_path, monkeypatch):
+    path = tmp_path / 'incoming.csv'
+    append(path, 'userId,movieId,rating,timestamp')
+    ingestor.ingest_file(path)
+    append(path, '2,3,4.5,1700000001', '4,5,3.0,1700000003')
+
+    def fail(events, malformed=0):
+        raise OSError("磁盘暂时不可用")
+    monkeypatch.setattr(ingestor, 'ingest', fail)
+    with pytest.raises(OSError):
+        ingestor.ingest_file(path)
+    monkeypatch.undo()
+
+    report = ingestor.ingest_file(path)
+    assert report['accepted'] == 2
+    assert ingestor.ingest_file(path) is None
@@ -0,0 +1,178 @@
+"""🌐 JSON API 服务：在本地端口上启动真实的服务，用 HTTP 请求检查各接口"""
+import asyncio
+import http.client
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recommender.data import load_movie_data
+from recommender.engine import Engine
+from recommender.service import RecommendationService
+
+GENRES = ('Comedy', 'Drama|Romance', 'Action|Sci-Fi', 'Comedy|Drama')
+N_USERS = 30
+N_MOVIES = 8
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    """在后台线程中运行服务（合并窗口放宽到 0.2 秒，便于并发请求落入同一批），返回 (服务, 地址)"""
+    data_dir = tmp_path_factory.mktemp('data')
+    rng = np.random.default_rng(7)
+    users, movies = np.meshgrid(np.arange(1, N_USERS + 1), np.arange(1, N_MOVIES + 1), indexing='ij')
+    # 电影 i 只有前 N_USERS - 3i 位用户评分：评分数各不相同，平均分与贝叶斯平均分的排序不同
+    rated = users <= N_USERS - 3 * movies
+    pd.DataFrame({
+        'userId': users[rated],
+        'movieId': movies[rated],
+        'rating': rng.integers(1, 11, int(rated.sum())) / 2,
+        'timestamp': 964982703 + np.arange(int(rated.sum())),
+    }).to_csv(data_dir / 'ratings.csv', index=False)
+    pd.DataFrame({
+        'movieId': np.arange(1, N_MOVIES + 1),
+        'title': [f"Movie {i} ({1990 + i})" for i in range(1, N_MOVIES + 1)],
+        'genres': [GENRES[i % len(GENRES)] for i in range(N_MOVIES)],
+    }).to_csv(data_dir / 'movies.csv', index=False)
+
+    service = RecommendationService(Engine(load_movie_data(str(data_dir), use_snapshot=False)), batch_window=0.2)
+    service.calls = []
+    recommend_many = service.engine.recommend_many
+    def counted(queries, *args, **kwargs):
+        service.calls.append(len(queries))
+        return recommend_many(queries, *args, **kwargs)
+    service.engine.recommend_many = counted
+
+    service.connections = 0
+    handle_connection = service.handle_connection
+    async def counted_connection(reader, writer):
+        service.connections += 1
+        await handle_connection(reader, writer)
+    service.handle_connection = counted_connection
+
+    started = threading.Event()
+    address = []
+    def ready(host_port):
+        address.extend(host_port)
+        started.set()
+    threading.Thread(target=lambda: asyncio.run(service.serve(port=0, ready=ready)), daemon=True).start()
+    assert started.wait(30)
+    return service, tuple(address)
+
+
+def get(connection, path):
+    connection.request('GET', path)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read()), response
+
+
+def fetch(address, path):
+    connection = http.client.HTTPConnection(*address, timeout=10)
+    try:
+        return get(connection, path)[:2]
+    finally:
+        connection.close()
+
+
+def test_similar(server):
+    _, address = server
+    status, body = fetch(address, '/similar?movie_id=1&min_ratings=1&top_n=3')
+    assert status == 200
+    assert body['movie'] == {'movieId': 1, 'title': 'Movie 1 (1991)', 'genres': 'Comedy'}
+    assert 0 < len(body['results']) <= 3
+    assert all(result['movieId'] != 1 for result in body['results'])
+    correlations = [result['correlation'] for result in body['results']]
+    assert correlations == sorted(correlations, reverse=True)
+
+
+def test_concurrent_similar_requests_are_merged(server):
+    service, address = server
+    calls, batches = len(service.calls), service.batcher.batches
+    barrier = threading.Barrier(6)
+    statuses = {}
+    def request(movie_id):
+        barrier.wait()
+        statuses[movie_id] = fetch(address, f'/similar?movie_id={movie_id}&min_ratings=1')[0]
+    threads = [threading.Thread(target=request, args=(movie_id,)) for movie_id in range(1, 7)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == {movie_id: 200 for movie_id in range(1, 7)}
+    assert service.calls[calls:] == [6]
+    assert service.batcher.batches == batches + 1
+
+
+@pytest.mark.parametrize('query', ['genre=Comedy&', ''])
+def test_top(server, query):
+    _, address = server
+    status, body = fetch(address, f'/top?{query}min_ratings=1&top_n=5')
+    assert status == 200
+    assert body['results'] and all('Comedy' in result['genres'] for result in body['results'] if query)
+    ratings = [result['avg_rating'] for result in body['results']]
+    assert ratings == sorted(ratings, reverse=True)
+
+
+def test_search(server):
+    _, address = server
+    status, body = fetch(address, '/search?q=movie%203')
+    assert status == 200
+    assert body['results'][0]['movieId'] == 3
+
+
+def test_user(server):
+    _, address = server
+    status, body = fetch(address, '/users/5')
+    assert status == 200
+    assert body['userId'] == 5 and body['total_movies'] == N_MOVIES
+    assert sum(body['favorite_genres'].values()) > 0
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/users/999', 404),
+    ('/similar?movie_id=999&min_ratings=1', 404),
+    ('/top?genre=Western', 404),
+    ('/unknown', 404),
+    ('/search', 400),
+    ('/similar', 400),
+    ('/similar?movie_id=abc', 400),
+    ('/users/abc', 400),
+])
+def test_errors(server, path, status):
+    _, address = server
+    code, body = fetch(address, path)
+    assert code == status
+    assert body['error']
+
+
+def test_keep_alive_reuses_connection(server):
+    service, address = server
+    connections = service.connections
+    connection = http.client.HTTPConnection(*address, timeout=10)
+    try:
+        statuses = []
+        for path in ('/search?q=movie', '/users/1', '/top?min_ratings=1'):
+            status, _, response = get(connection, path)
+            statuses.append(status)
+            assert response.getheader('Connection') == 'keep-alive'
+            if path == '/search?q=movie':
+                sock = connection.sock
+            assert connection.sock is sock
+    finally:
+        connection.close()
+    assert statuses == [200, 200, 200]
+    assert service.connections == connections + 1
+
+
+def test_metrics_count_requests(server):
+    _, address = server
+    before = fetch(address, '/metrics')[1]['latency'].get('/search', {'count': 0})['count']
+    for query in ('movie', 'movie%202'):
+        assert fetch(address, f'/search?q={query}')[0] == 200
+    status, body = fetch(address, '/metrics')
+    assert status == 200
+    assert body['latency']['/search']['count'] == before + 2
+    assert body['latency']['/metrics']['count'] >= 1
+    assert body['batching']['queries'] >= body['batching']['batches']